@@ -0,0 +1,66 @@
+"""Check and time language detection on short labelled lines
+
+Lines detection cannot decide follow the paragraph before them only if
+they show signs of its language, else take the default. Run from the
+repository root:
+    python benchmarks/bench_language.py
+
+Exits with status 1 if any line ends up in the wrong language.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'jottr'))
+
+from language_detector import resolve_language
+
+LANGUAGES = ['en_US', 'fr_FR', 'es_ES', 'fa_IR']  # The spell_languages default plus Farsi
+
+# (language of the paragraph before or None, expected language, line)
+CASES = [(None, expected, text) for expected, text in [
+    # Short English lines with names and words that look foreign
+    ('en_US', "Police arrested a man on Monday"),
+    ('en_US', "Los Angeles fire update"),
+    ('en_US', "Paris fashion week opens"),
+    ('en_US', "Café au lait for everyone"),
+    ('en_US', "Le Monde reports a new deal"),
+    ('en_US', "El Paso council meets on Tuesday"),
+    ('en_US', "Costa Rica votes"),
+    ('en_US', "A man was arrested in San Antonio"),
+    ('en_US', "The mayor of San Diego said the plan would go ahead"),
+    ('en_US', "Breaking: a Spanish court ruled on Monday that the law was valid"),
+    # Sentences in the other languages
+    ('fr_FR', "Le président a parlé aux journalistes dans la capitale"),
+    ('fr_FR', "Le gouvernement a annoncé des mesures pour les familles"),
+    ('fr_FR', "Elle est partie avec ses amis pour les vacances"),
+    ('es_ES', "El presidente habló con los periodistas en la capital"),
+    ('es_ES', "Los precios de la vivienda subieron un 5% en el último año"),
+    ('es_ES', "La policía detuvo a dos personas por el robo del banco"),
+]] + [
+    # Short lines after a foreign paragraph
+    ('es_ES', 'en_US', "SOUNDBITE (Spanish) Interior Ministry spokesperson:"),
+    ('fa_IR', 'en_US', "SOUNDBITE (Farsi) Foreign Ministry spokesperson:"),
+    ('fr_FR', 'en_US', "UPDATE 2"),
+    ('es_ES', 'es_ES', "Dijo el ministro:"),
+    ('fa_IR', 'fa_IR', "گزارش BBC"),
+]
+
+def main():
+    failures = []
+    for previous, expected, text in CASES:
+        got = resolve_language(text, LANGUAGES, previous)
+        if got != expected:
+            failures.append((expected, text, got))
+    for expected, text, got in failures:
+        print(f"FAIL {text!r}: expected {expected}, got {got}")
+
+    runs = 200
+    seconds = timeit.timeit(lambda: [resolve_language(text, LANGUAGES, previous)
+                                     for previous, _, text in CASES], number=runs)
+    print(f"{len(CASES) - len(failures)}/{len(CASES)} lines correct, "
+          f"{seconds / (runs * len(CASES)) * 1e6:.1f} us per line")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
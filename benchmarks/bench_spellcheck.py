@@ -0,0 +1,216 @@
+"""Spell-check benchmarks for SpellCheckHighlighter
+
+Runs headless on the offscreen Qt platform over the corpora bundled in
+benchmarks/corpora and writes the results as JSON. From the repository root:
+    python benchmarks/bench_spellcheck.py --output spellcheck.json
+
+Each backend runs in its own process so memory figures do not mix.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPORA_DIR = os.path.join(HERE, 'corpora')
+sys.path.insert(0, os.path.join(HERE, '..', 'src', 'jottr'))
+
+BACKENDS = ('enchant', 'pyspellchecker')
+CORPORA = ('english_news', 'mixed_news')
+TYPED_TEXT = "teh reporter said "
+
+def load_corpus(name, size):
+    """Repeat a bundled corpus until it is about size characters long"""
+    with open(os.path.join(CORPORA_DIR, name + '.txt'), 'r', encoding='utf-8') as f:
+        text = f.read().strip() + '\n\n'
+    return (text * (size // len(text) + 1))[:size].rsplit('\n', 1)[0]
+
+def peak_memory_kb():
+    """Peak resident set size of this process in KiB, if the platform reports it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def summarize(samples_ms):
+    """Median, 95th percentile and maximum of a list of milliseconds"""
+    samples = sorted(samples_ms)
+    return {
+        'count': len(samples),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'max_ms': round(samples[-1], 3)
+    }
+
+def wait_until_idle(app, highlighter, timeout=300):
+    """Process events until the highlighter has nothing left to check"""
+    deadline = time.perf_counter() + timeout
+    app.processEvents()
+    while not highlighter.is_idle():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Spell check did not finish in time")
+        time.sleep(0.0002)  # Let the worker thread run
+        app.processEvents()
+
+def bench_corpus(app, service, settings_manager, text, keystrokes, suggestions):
+    """Measure one corpus with the currently selected backend"""
+    from PyQt5.QtWidgets import QTextEdit
+    from editor_tab import SpellCheckHighlighter
+
+    editor = QTextEdit()
+    editor.resize(900, 700)
+    editor.show()
+    highlighter = SpellCheckHighlighter(editor.document(), settings_manager)
+    service.set_cache_dir(None)  # Measure cold checks, not an earlier run's cache
+    service.verdict_cache.clear()
+    service.suggestion_cache.clear()
+
+    # Full document
+    start = time.perf_counter()
+    editor.setPlainText(text)
+    wait_until_idle(app, highlighter)
+    full_highlight = time.perf_counter() - start
+
+    # Typing in random paragraphs, waiting for each re-highlight
+    rng = random.Random(0)
+    document = editor.document()
+    latencies = []
+    while len(latencies) < keystrokes:
+        block = document.findBlockByNumber(rng.randrange(document.blockCount()))
+        cursor = editor.textCursor()
+        cursor.setPosition(block.position() + block.length() - 1)
+        editor.setTextCursor(cursor)
+        for char in TYPED_TEXT:
+            start = time.perf_counter()
+            editor.insertPlainText(char)
+            wait_until_idle(app, highlighter)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    # Cold suggestions for misspellings found in the document
+    words = {}
+    block = document.firstBlock()
+    while block.isValid() and len(words) < suggestions:
+        data = block.userData()
+        for _, _, word in getattr(data, 'misspellings', []):
+            words.setdefault(word, data.language)
+        block = block.next()
+    suggestion_latencies = []
+    for word, language in list(words.items())[:suggestions]:
+        start = time.perf_counter()
+        service.suggest(word, language)
+        suggestion_latencies.append((time.perf_counter() - start) * 1000)
+
+    result = {
+        'characters': len(text),
+        'blocks': document.blockCount(),
+        'full_highlight_s': round(full_highlight, 4),
+        'keystroke': summarize(latencies),
+        'suggestion': summarize(suggestion_latencies) if suggestion_latencies else None,
+        'verdict_cache': service.verdict_cache.stats()
+    }
+    highlighter.setDocument(None)
+    editor.deleteLater()
+    app.processEvents()
+    return result
+
+def run_backend(backend, size, keystrokes, suggestions):
+    """Benchmark one backend in this process"""
+    config_home = tempfile.mkdtemp(prefix='jottr-bench-')
+    os.environ['XDG_CONFIG_HOME'] = config_home
+    os.environ['APPDATA'] = config_home
+
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    import editor_tab
+    from settings_manager import SettingsManager
+
+    if backend == 'enchant' and not editor_tab.USE_ENCHANT:
+        return {'skipped': 'enchant is not installed'}
+    memory_start = peak_memory_kb()
+    service = editor_tab.SpellCheckService.instance()
+    service.USE_ENCHANT = backend == 'enchant'
+    settings_manager = SettingsManager()
+    service.set_languages(settings_manager.get_setting('spell_languages', ['en_US']))
+
+    # Load every dictionary up front so the timings below exclude it
+    start = time.perf_counter()
+    for language in service.languages:
+        service.spell_for(language)
+    result = {'backend_load_s': round(time.perf_counter() - start, 4), 'corpora': {}}
+
+    for name in CORPORA:
+        result['corpora'][name] = bench_corpus(app, service, settings_manager,
+                                               load_corpus(name, size),
+                                               keystrokes, suggestions)
+    service.shutdown()
+
+    memory_end = peak_memory_kb()
+    if memory_end is not None:
+        result['peak_rss_kb'] = memory_end
+        result['peak_rss_growth_kb'] = memory_end - memory_start
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='spellcheck-benchmark.json',
+                        help="Where to write the JSON results")
+    parser.add_argument('--size', type=int, default=200000,
+                        help="Characters per corpus")
+    parser.add_argument('--keystrokes', type=int, default=len(TYPED_TEXT) * 5,
+                        help="Keystrokes to time per corpus")
+    parser.add_argument('--suggestions', type=int, default=20,
+                        help="Misspelled words to time suggestions for")
+    parser.add_argument('--backend', choices=BACKENDS, action='append',
+                        help="Only run this backend (repeatable)")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_backend(args.backend[0], args.size, args.keystrokes, args.suggestions)
+        with open(args.child, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'settings': {'size': args.size, 'keystrokes': args.keystrokes,
+                     'suggestions': args.suggestions},
+        'results': {}
+    }
+    for backend in args.backend or BACKENDS:
+        print(f"Benchmarking {backend}...")
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+            child_output = f.name
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--child', child_output,
+                            '--backend', backend, '--size', str(args.size),
+                            '--keystrokes', str(args.keystrokes),
+                            '--suggestions', str(args.suggestions)], check=True)
+            with open(child_output, 'r', encoding='utf-8') as f:
+                report['results'][backend] = json.load(f)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            report['results'][backend] = {'error': str(e)}
+        finally:
+            os.remove(child_output)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Compare the old QRegExp word scan with word_tokenizer.tokenize
+
+Run from the repository root:
+    python benchmarks/bench_tokenizer.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'jottr'))
+
+from PyQt5.QtCore import QRegExp
+from word_tokenizer import tokenize, SCRIPT_LATIN
+
+ENGLISH = ("the quick brown fox jumps over lazy dog while reporters file "
+           "their stories before deadline editor café naïve 2024 x_1").split()
+FARSI = "سلام دنیا این یک متن آزمایشی است که برای سنجش سرعت نوشته شده".split()
+
+def make_text(words=20000, farsi_ratio=0.3, seed=1):
+    """Generate mixed English/Farsi text with line breaks every 12 words"""
+    rng = random.Random(seed)
+    tokens = []
+    for i in range(words):
+        pool = FARSI if rng.random() < farsi_ratio else ENGLISH
+        tokens.append(rng.choice(pool))
+        tokens.append('\n' if i % 12 == 11 else ' ')
+    return ''.join(tokens)
+
+def qregexp_scan(text):
+    """The scan the highlighter used before: QRegExp plus a latin-1 probe"""
+    words = []
+    expression = QRegExp("\\b\\w+\\b")
+    index = expression.indexIn(text)
+    while index >= 0:
+        word = expression.cap()
+        length = len(word)
+        try:
+            word.encode('latin-1')
+            words.append((index, length, word))
+        except UnicodeEncodeError:
+            pass
+        index = expression.indexIn(text, index + length)
+    return words
+
+def tokenizer_scan(text):
+    """The current scan: one precompiled regex pass plus a script table"""
+    return [(start, length, text[start:start + length])
+            for start, length, script in tokenize(text)
+            if script == SCRIPT_LATIN]
+
+def bench(name, func, lines, repeat=5):
+    """Time func over every line and print the best run"""
+    best = min(timeit.repeat(lambda: [func(line) for line in lines],
+                             number=1, repeat=repeat))
+    print(f"{name:<12} {best * 1000:8.2f} ms")
+    return best
+
+def main():
+    for farsi_ratio in (0.0, 0.3, 0.7):
+        lines = make_text(farsi_ratio=farsi_ratio).split('\n')
+        print(f"{len(lines)} lines, {int(farsi_ratio * 100)}% Farsi words")
+        old = bench("QRegExp", qregexp_scan, lines)
+        new = bench("tokenize", tokenizer_scan, lines)
+        print(f"speedup      {old / new:8.2f}x\n")
+
+if __name__ == '__main__':
+    main()
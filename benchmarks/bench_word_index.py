@@ -0,0 +1,86 @@
+"""Time line joins against the completion word index of a large document
+
+Joining two lines deletes a block, which the word index has to notice
+without walking the whole document on the keystroke. Runs headless on the
+offscreen Qt platform. From the repository root:
+    python benchmarks/bench_word_index.py
+
+Exits with status 1 if a join is slower than --max-ms or the counts are
+wrong once the index is idle.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'jottr'))
+
+WORDS = "reporter editor deadline story source interview headline column".split()
+
+def wait_until_idle(app, word_index, timeout=300):
+    """Process events until the index has caught up with every edit"""
+    deadline = time.perf_counter() + timeout
+    app.processEvents()
+    while word_index._pending or word_index._sweep is not None:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Word index did not finish in time")
+        app.processEvents()
+
+def recount(document, min_length):
+    """Word counts of document from scratch"""
+    from word_tokenizer import tokenize, SCRIPT_COMMON
+    counts = Counter()
+    block = document.firstBlock()
+    while block.isValid():
+        text = block.text()
+        counts.update(text[start:start + length] for start, length, script in tokenize(text)
+                      if length >= min_length and script != SCRIPT_COMMON)
+        block = block.next()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=120000, help="Lines in the document")
+    parser.add_argument('--joins', type=int, default=50, help="Line joins to time")
+    parser.add_argument('--max-ms', type=float, default=20, help="Slowest join allowed")
+    args = parser.parse_args()
+
+    from PyQt5.QtWidgets import QApplication, QTextEdit
+    from PyQt5.QtGui import QTextCursor
+    app = QApplication.instance() or QApplication(sys.argv)
+    from editor_tab import DocumentWordIndex
+
+    rng = random.Random(0)
+    editor = QTextEdit()
+    document = editor.document()
+    document.setPlainText('\n'.join(' '.join(rng.choice(WORDS) for _ in range(8))
+                                    for _ in range(args.lines)))
+    word_index = DocumentWordIndex(document)
+    wait_until_idle(app, word_index)
+
+    # Backspace at the start of random lines, letting the event loop run
+    # in between as typing would
+    cursor = QTextCursor(document)
+    latencies = []
+    for _ in range(args.joins):
+        block = document.findBlockByNumber(rng.randrange(1, document.blockCount()))
+        cursor.setPosition(block.position())
+        start = time.perf_counter()
+        cursor.deletePreviousChar()
+        latencies.append((time.perf_counter() - start) * 1000)
+        app.processEvents()
+    wait_until_idle(app, word_index)
+
+    correct = word_index.counts == dict(recount(document, DocumentWordIndex.min_length))
+    latencies.sort()
+    print(f"{args.joins} joins on {args.lines} lines: median {statistics.median(latencies):.3f} ms, "
+          f"max {latencies[-1]:.3f} ms; counts {'correct' if correct else 'WRONG'}")
+    return 0 if correct and latencies[-1] <= args.max_ms else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+from session_store import SessionStore
+from version_store import VersionStore
+
+# A checkpoint of one tab, captured on the GUI thread. The writer owns
+# metadata once the snapshot is submitted. verify reads the content back
+# after writing it.
+AutosaveSnapshot = namedtuple('AutosaveSnapshot', 'tab_id text metadata verify',
+                              defaults=(False,))
+
+class AutosaveWriter(QThread):
+    """Writes queued autosave work to the session database off the GUI thread
+
+    Everything queued when the thread wakes up goes into one transaction,
+    keeping only the newest checkpoint per tab.
+    """
+    # editor tab, checksum of the written content
+    snapshotSaved = pyqtSignal(object, str)
+    # editor tab, error message
+    snapshotFailed = pyqtSignal(object, str)
+    _instance = None
+
+    @classmethod
+    def instance(cls, database_path=None, history_path=None):
+        """Return the shared writer, starting it on first use"""
+        if cls._instance is None:
+            cls._instance = cls(database_path, history_path)
+            cls._instance.snapshotSaved.connect(cls._deliver_saved)
+            cls._instance.snapshotFailed.connect(cls._deliver_failed)
+            app = QApplication.instance()
+            if app:
+                app.aboutToQuit.connect(cls._instance.stop)
+            cls._instance.start()
+        return cls._instance
+
+    def __init__(self, database_path, history_path=None):
+        super().__init__()
+        self.database_path = database_path
+        self.history_path = history_path  # Version history, if kept
+        self._snapshots = {}  # tab id -> (owner, snapshot) not yet written
+        self._ops = {}  # tab id -> (owner, [(epoch, op)]) not yet written
+        self._removed = set()  # Tab ids whose rows go
+        self._tab_order = None
+        self._clean_exit = None
+        self._condition = threading.Condition()
+        self._holding = 0
+        self._writing = False
+        self._stopping = False
+
+    @staticmethod
+    def _deliver_saved(owner, checksum):
+        """Tell the editor its snapshot is on disk, on the GUI thread"""
+        try:
+            owner.autosave_finished(checksum)
+        except RuntimeError:
+            pass  # Editor was closed while its snapshot was written
+
+    @staticmethod
+    def _deliver_failed(owner, message):
+        """Tell the editor its autosave could not be written, on the GUI thread"""
+        try:
+            owner.autosave_failed(message)
+        except RuntimeError:
+            pass
+
+    def _has_work(self):
+        return bool(self._snapshots or self._ops or self._removed
+                    or self._tab_order is not None or self._clean_exit is not None)
+
+    @contextmanager
+    def batch(self):
+        """Hold writes back until the block ends, so they share one transaction"""
+        with self._condition:
+            self._holding += 1
+        try:
+            yield self
+        finally:
+            with self._condition:
+                self._holding -= 1
+                self._condition.notify_all()
+
+    def submit(self, owner, snapshot):
+        """Queue a checkpoint, replacing an unwritten older one of the same tab"""
+        with self._condition:
+            self._snapshots[snapshot.tab_id] = (owner, snapshot)
+            self._removed.discard(snapshot.tab_id)
+            self._condition.notify_all()
+
+    def append(self, owner, tab_id, epoch, ops):
+        """Queue journal operations of a tab, after any queued earlier"""
+        with self._condition:
+            self._ops.setdefault(tab_id, (owner, []))[1].extend((epoch, op) for op in ops)
+            self._condition.notify_all()
+
+    def remove_tab(self, tab_id):
+        """Drop a tab from the session, with anything still queued for it"""
+        with self._condition:
+            self._snapshots.pop(tab_id, None)
+            self._ops.pop(tab_id, None)
+            self._removed.add(tab_id)
+            self._condition.notify_all()
+
+    def set_tab_order(self, tab_ids):
+        """Record the order of the open tabs"""
+        with self._condition:
+            self._tab_order = list(tab_ids)
+            self._condition.notify_all()
+
+    def mark_clean_exit(self, clean=True):
+        """Record whether the session ended cleanly"""
+        with self._condition:
+            self._clean_exit = clean
+            self._condition.notify_all()
+
+    def flush(self):
+        """Block until everything queued has been written"""
+        with self._condition:
+            while self._has_work() or self._writing:
+                self._condition.wait()
+
+    def stop(self):
+        """Write what is queued, then finish the thread and wait for it"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self.wait()
+        AutosaveWriter._instance = None
+
+    def _add_versions(self, history, snapshots, checksums):
+        """Keep each written checkpoint in the version history"""
+        for tab_id, (_, snapshot) in snapshots.items():
+            try:
+                history.add_version(snapshot.metadata.get('document', tab_id), snapshot.text,
+                                    checksums[tab_id], snapshot.metadata.get('timestamp'))
+            except Exception as e:
+                print(f"Failed to store version: {str(e)}")
+
+    def run(self):
+        store = None
+        history = None
+        while True:
+            with self._condition:
+                while (not self._has_work() or self._holding) and not self._stopping:
+                    self._condition.wait()
+                if not self._has_work():
+                    break  # Stopping with nothing left to write
+                snapshots, self._snapshots = self._snapshots, {}
+                ops, self._ops = self._ops, {}
+                removed, self._removed = self._removed, set()
+                tab_order, self._tab_order = self._tab_order, None
+                clean_exit, self._clean_exit = self._clean_exit, None
+                self._writing = True
+
+            try:
+                if store is None:
+                    store = SessionStore(self.database_path)
+                checksums = store.write_round(
+                    [snapshot for _, snapshot in snapshots.values()],
+                    {tab_id: tab_ops for tab_id, (_, tab_ops) in ops.items()},
+                    removed, tab_order, clean_exit)
+            except Exception as e:
+                owners = {id(owner): owner for owner, _ in
+                          list(snapshots.values()) + list(ops.values())}
+                for owner in owners.values():
+                    self.snapshotFailed.emit(owner, str(e))
+                if not owners:
+                    print(f"Autosave failed: {str(e)}")
+            else:
+                for tab_id, (owner, _) in snapshots.items():
+                    self.snapshotSaved.emit(owner, checksums[tab_id])
+                if snapshots and self.history_path:
+                    try:
+                        if history is None:
+                            history = VersionStore(self.history_path)
+                        self._add_versions(history, snapshots, checksums)
+                    except Exception as e:
+                        print(f"Failed to open version history: {str(e)}")
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+        if store is not None:
+            store.close()
+        if history is not None:
+            history.close()
+
+class AutosaveScheduler(QObject):
+    """Autosaves dirty editor tabs of one window from a single timer
+
+    Each round saves the active tab first, then the tabs that have waited
+    longest, until the round's byte budget is spent. Tabs left over are
+    saved on the next round. With no dirty tabs the timer stays stopped.
+    """
+    def __init__(self, settings_manager, tab_widget, parent=None):
+        super().__init__(parent)
+        self.settings_manager = settings_manager
+        self.tab_widget = tab_widget
+        self.database_path = os.path.join(settings_manager.get_recovery_dir(), 'session.db')
+        self.history_path = os.path.join(settings_manager.config_dir, 'history.db')
+        self.writer = AutosaveWriter.instance(self.database_path, self.history_path)
+        self._dirty = {}  # id(tab) -> (tab, time it became dirty)
+        self._tab_order = None  # Last order handed to the writer
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.run_round)
+
+    def interval(self):
+        """Milliseconds between autosave rounds"""
+        return self.settings_manager.get_setting('autosave_interval_ms', 5000)
+
+    def budget(self):
+        """Bytes one round may hand to the writer, roughly"""
+        return self.settings_manager.get_setting('autosave_budget_kb', 4096) * 1024
+
+    def mark_dirty(self, tab):
+        """Schedule tab for the next round"""
+        if id(tab) not in self._dirty:
+            self._dirty[id(tab)] = (tab, time.monotonic())
+        if not self._timer.isActive():
+            self._timer.start(self.interval())
+
+    def forget(self, tab):
+        """Stop tracking a closed tab and drop it from the session"""
+        self._dirty.pop(id(tab), None)
+        self.writer.remove_tab(tab.recovery_id)
+        if not self._dirty:
+            self._timer.stop()
+
+    def pending(self):
+        """Dirty tabs in the order they will be saved"""
+        active = self.tab_widget.currentWidget()
+        entries = sorted(self._dirty.values(),
+                         key=lambda entry: (entry[0] is not active, entry[1]))
+        return [tab for tab, _ in entries]
+
+    def run_round(self, budget=None):
+        """Save dirty tabs in priority order until budget bytes are used"""
+        budget = self.budget() if budget is None else budget
+        spent = 0
+        with self.writer.batch():  # One transaction for the whole round
+            for tab in self.pending():
+                if spent and spent >= budget:
+                    break  # Always save at least one tab per round
+                self._dirty.pop(id(tab), None)
+                try:
+                    if tab.changes_pending:
+                        spent += tab.autosave()
+                except RuntimeError:
+                    pass  # Tab was deleted
+            tab_order = [tab.recovery_id for tab in
+                         (self.tab_widget.widget(i) for i in range(self.tab_widget.count()))
+                         if hasattr(tab, 'recovery_id')]
+            if tab_order != self._tab_order:
+                self.writer.set_tab_order(tab_order)
+                self._tab_order = tab_order
+        if self._dirty:
+            self._timer.start(self.interval())
+
+    def flush(self):
+        """Save every dirty tab now and wait until the writer has written them"""
+        self._timer.stop()
+        while self._dirty:
+            self.run_round(budget=float('inf'))
+        self.writer.flush()
+
+    def finish_session(self):
+        """Save everything and record a clean exit, so nothing is recovered next time"""
+        self.flush()
+        self.writer.mark_clean_exit()
+        self.writer.flush()
@@ -0,0 +1,143 @@
+import math
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+class CompletionProvider:
+    """Source of completions for the word being typed
+
+    Providers with threaded set run on the shared CompletionWorker, so
+    they may be slow; the others run on the GUI thread and must be fast.
+    """
+    kind = 'word'
+    threaded = False
+
+    def complete(self, prefix, limit):
+        """Return up to limit completions for prefix"""
+        raise NotImplementedError
+
+class SnippetCompletionProvider(CompletionProvider):
+    """Snippet titles fuzzily matching the typed word, most used first"""
+    kind = 'snippet'
+
+    def __init__(self, snippet_manager):
+        self.snippet_manager = snippet_manager
+
+    def complete(self, prefix, limit):
+        return self.snippet_manager.complete(prefix, limit)
+
+class DictionaryCompletionProvider(CompletionProvider):
+    """User dictionary words starting with the typed word"""
+    def __init__(self, user_dictionary):
+        self.user_dictionary = user_dictionary
+
+    def complete(self, prefix, limit):
+        return self.user_dictionary.prefix_matches(prefix, limit)
+
+class CorpusCompletionProvider(CompletionProvider):
+    """Words already used in any open document, ranked by frequency and recency"""
+    def __init__(self, word_indexes):
+        self.word_indexes = word_indexes  # Callable returning every DocumentWordIndex
+
+    def complete(self, prefix, limit):
+        counts = {}
+        ages = {}
+        for word_index in self.word_indexes():
+            for word, count, age in word_index.candidates(prefix):
+                counts[word] = counts.get(word, 0) + count
+                ages[word] = min(age, ages.get(word, age))
+        
+        # Frequency counts logarithmically so a name typed a minute ago can
+        # beat a common word typed long ago
+        def score(word):
+            return math.log2(1 + counts[word]) + 4 / (1 + ages[word] / 50)
+        return sorted(counts, key=score, reverse=True)[:limit]
+
+def collect_completions(providers, word, limit, suggestions=None):
+    """Append (kind, text) from providers to suggestions, up to limit
+
+    Words equal to the typed word are skipped, as are duplicates.
+    """
+    suggestions = list(suggestions or [])
+    seen = {text for _, text in suggestions}
+    folded_word = word.casefold()
+    for provider in providers:
+        if len(suggestions) >= limit:
+            break
+        # One extra covers the word itself, which is skipped
+        for text in provider.complete(word, limit - len(suggestions) + 1):
+            if text in seen or (provider.kind == 'word' and text.casefold() == folded_word):
+                continue
+            if len(suggestions) >= limit:
+                break
+            seen.add(text)
+            suggestions.append((provider.kind, text))
+    return suggestions
+
+class CompletionWorker(QThread):
+    """Runs threaded completion providers, keeping only each editor's newest request"""
+    # editor tab, request tag, word, [(kind, text)]
+    completionsReady = pyqtSignal(object, object, str, list)
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Return the shared worker, starting it on first use"""
+        if cls._instance is None:
+            cls._instance = cls()
+            cls._instance.completionsReady.connect(cls._deliver)
+            app = QApplication.instance()
+            if app:
+                app.aboutToQuit.connect(cls._instance.stop)
+            cls._instance.start()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self._requests = {}  # id(owner) -> newest request of that editor
+        self._condition = threading.Condition()
+        self._stopping = False
+
+    @staticmethod
+    def _deliver(owner, tag, word, suggestions):
+        """Hand results to their editor on the GUI thread"""
+        try:
+            owner.apply_completions(tag, word, suggestions)
+        except RuntimeError:
+            pass  # Editor was closed while the request was running
+
+    def submit(self, owner, tag, word, providers, limit):
+        """Queue a request, replacing any older one from the same editor"""
+        with self._condition:
+            self._requests[id(owner)] = (owner, tag, word, providers, limit)
+            self._condition.notify()
+
+    def discard(self, owner):
+        """Drop the queued request of an editor"""
+        with self._condition:
+            self._requests.pop(id(owner), None)
+
+    def stop(self):
+        """Ask the thread to finish and wait for it"""
+        with self._condition:
+            self._stopping = True
+            self._requests = {}
+            self._condition.notify()
+        self.wait()
+        CompletionWorker._instance = None
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._requests and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                _, (owner, tag, word, providers, limit) = self._requests.popitem()
+            
+            try:
+                suggestions = collect_completions(providers, word, limit)
+            except Exception as e:
+                print(f"Completion worker error: {str(e)}")
+                continue
+            self.completionsReady.emit(owner, tag, word, suggestions)
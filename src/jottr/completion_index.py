@@ -0,0 +1,51 @@
+from bisect import bisect_left, insort
+
+class CompletionIndex:
+    """Case-insensitive prefix index over strings, kept as a sorted array"""
+    def __init__(self, items=()):
+        self.rebuild(items)
+
+    def rebuild(self, items):
+        """Replace every entry at once"""
+        self._entries = sorted({(item.casefold(), item) for item in items})
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        index = bisect_left(self._entries, (item.casefold(), item))
+        return index < len(self._entries) and self._entries[index][1] == item
+
+    def add(self, item):
+        """Insert item in O(log n) search plus one array shift"""
+        if item not in self:
+            insort(self._entries, (item.casefold(), item))
+
+    def remove(self, item):
+        """Remove item if present"""
+        index = bisect_left(self._entries, (item.casefold(), item))
+        if index < len(self._entries) and self._entries[index][1] == item:
+            del self._entries[index]
+
+    def matches(self, prefix, limit=None):
+        """Return items starting with prefix, ignoring case
+
+        Results come in case-insensitive alphabetical order, so shorter
+        completions of the same stem rank first. With limit, only the
+        top matches are visited.
+        """
+        folded = prefix.casefold()
+        if not folded:
+            return []
+        matches = []
+        entries = self._entries
+        index = bisect_left(entries, (folded,))
+        while index < len(entries):
+            key, item = entries[index]
+            if not key.startswith(folded):
+                break
+            matches.append(item)
+            if limit is not None and len(matches) >= limit:
+                break
+            index += 1
+        return matches
@@ -0,0 +1,64 @@
+from PyQt5.QtGui import QTextCursor
+
+def replay_ops(text, ops):
+    """Apply journaled (position, chars removed, text added) operations to text"""
+    # Positions come from QTextDocument, which counts UTF-16 code units
+    buffer = bytearray(text.encode('utf-16-le', errors='surrogatepass'))
+    for position, removed, added in ops:
+        buffer[2 * position:2 * (position + removed)] = added.encode('utf-16-le',
+                                                                     errors='surrogatepass')
+    return buffer.decode('utf-16-le', errors='surrogatepass')
+
+class EditJournal:
+    """Edits made to a document since its last autosave checkpoint
+
+    Each checkpoint starts a new epoch. Recovery takes the checkpoint and
+    replays the journals of its epoch and any later ones.
+    """
+    max_op_chars = 65536  # Bigger insertions are cheaper to checkpoint than to journal
+
+    def __init__(self, document):
+        self.document = document
+        self.epoch = 0
+        self.ops = []  # (position, chars removed, text added) not yet written
+        self.journal_chars = 0  # Roughly how much the current epoch's journal holds
+        self.needs_checkpoint = True  # Nothing to replay edits onto yet
+        self._revision = document.revision()
+        document.contentsChange.connect(self._handle_contents_change)
+
+    def _handle_contents_change(self, position, chars_removed, chars_added):
+        """Record one edit as the operation that replays it"""
+        revision = self.document.revision()
+        if chars_removed == chars_added and revision == self._revision:
+            return  # Only formatting changed
+        self._revision = revision
+        if self.needs_checkpoint:
+            return  # The coming checkpoint contains this edit
+        if chars_added > self.max_op_chars:
+            self.needs_checkpoint = True
+            self.ops = []
+            return
+
+        added = ''
+        if chars_added:
+            # Qt counts the final paragraph separator when the whole text is replaced
+            end = min(position + chars_added, self.document.characterCount() - 1)
+            cursor = QTextCursor(self.document)
+            cursor.setPosition(position)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            added = cursor.selectedText().replace('\u2029', '\n').replace('\u00a0', ' ')
+        self.ops.append((position, chars_removed, added))
+        self.journal_chars += len(added) + 16
+
+    def take_ops(self):
+        """Return the edits recorded since the last call and forget them"""
+        ops, self.ops = self.ops, []
+        return ops
+
+    def start_checkpoint(self):
+        """Begin a new epoch for a checkpoint being written now; returns its number"""
+        self.epoch += 1
+        self.ops = []
+        self.journal_chars = 0
+        self.needs_checkpoint = False
+        return self.epoch
@@ -8,143 +8,1138 @@ if os.path.exists(vendor_dir):
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
                             QTextEdit, QListWidget, QInputDialog, QMenu, QFileDialog, QDialog,
-                            QToolBar, QAction, QCompleter, QListWidgetItem, QLineEdit, QPushButton, QMessageBox, QLabel, QShortcut, QToolTip)
-from PyQt5.QtCore import Qt, QUrl, QTimer, QStringListModel, QRegExp, QEvent
+                            QToolBar, QAction, QCompleter, QListWidgetItem, QLineEdit, QPushButton, QMessageBox, QLabel, QShortcut, QToolTip,
+                            QApplication, QListView, QAbstractItemView, QProgressBar)
+from PyQt5.QtCore import (Qt, QUrl, QTimer, QStringListModel, QEvent, QThread, pyqtSignal,
+                          QItemSelectionModel)
 from PyQt5.QtGui import (QTextCharFormat, QSyntaxHighlighter, QIcon, QFont, QKeySequence, 
-                        QPainter, QPen, QColor, QFontMetrics, QTextDocument, QTextCursor)
+                        QPainter, QPen, QColor, QFontMetrics, QTextDocument, QTextCursor, QTextBlockUserData, QTextLayout)
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
+from PyQt5 import sip
 from urllib.parse import quote
 from snippet_editor_dialog import SnippetEditorDialog
 from rss_reader import RSSReader
-import json
 import time
 from theme_manager import ThemeManager
+from word_tokenizer import tokenize, script_of, SCRIPT_LATIN, SCRIPT_COMMON
+from language_detector import resolve_language
+from verdict_store import save_verdicts, load_verdicts
+from completion import (CompletionWorker, SnippetCompletionProvider,
+                        DictionaryCompletionProvider, CorpusCompletionProvider,
+                        collect_completions)
+from completion_index import CompletionIndex
+from autosave import AutosaveSnapshot
+from edit_journal import EditJournal
+from file_loader import FileLoader
+from encoding_detector import detect_encoding, detect_file_encoding, can_encode
+from file_saver import FileSaver, SaveJob
 import hashlib
+import uuid
+import weakref
+import heapq
+import threading
+import itertools
+from collections import OrderedDict, Counter
 
 # Try enchant first, fallback to pyspellchecker
 try:
-    from enchant import Dict, DictNotFoundError
+    from enchant import Dict, DictNotFoundError, Broker
     USE_ENCHANT = True
 except (ImportError, ModuleNotFoundError) as e:
     print("Enchant not available, falling back to pyspellchecker:", str(e))
-    from spellchecker import SpellChecker
     USE_ENCHANT = False
 
+def is_latin_word(word):
+    """Check if word is written in Latin script"""
+    return bool(word) and script_of(word) == SCRIPT_LATIN
+
+class WordVerdictCache:
+    """Bounded LRU map of word -> spelled correctly"""
+    def __init__(self, maxsize=20000):
+        self.maxsize = maxsize
+        self._verdicts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, word):
+        """Return cached verdict or None, refreshing the entry's recency"""
+        verdict = self._verdicts.get(word)
+        if verdict is None:
+            self.misses += 1
+            return None
+        self._verdicts.move_to_end(word)
+        self.hits += 1
+        return verdict
+
+    def put(self, word, verdict):
+        """Store a verdict, evicting the least recently used entries"""
+        self._verdicts[word] = verdict
+        self._verdicts.move_to_end(word)
+        while len(self._verdicts) > self.maxsize:
+            self._verdicts.popitem(last=False)
+
+    def resize(self, maxsize):
+        """Change the capacity, evicting entries if it shrank"""
+        self.maxsize = max(1, int(maxsize))
+        while len(self._verdicts) > self.maxsize:
+            self._verdicts.popitem(last=False)
+
+    def clear(self):
+        """Drop every verdict, e.g. after the dictionary changed"""
+        self._verdicts.clear()
+
+    def __len__(self):
+        return len(self._verdicts)
+
+    def items(self):
+        """Return (word, verdict) pairs from least to most recently used"""
+        return list(self._verdicts.items())
+
+    def stats(self):
+        """Return size and hit-rate counters for debugging"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._verdicts),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+class SpellBlockData(QTextBlockUserData):
+    """Spell-check results stored on a text block"""
+    def __init__(self, block_id):
+        super().__init__()
+        self.block_id = block_id
+        self.revision = -1
+        self.length = -1  # setPlainText() can refill a block without a new revision
+        self.generation = -1
+        self.misspellings = []  # (start, length, word)
+        self.language = None  # Dictionary the block is checked against
+        self.language_stamp = None  # (revision, length) the language was decided at
+        self.language_length = -1  # Text length when the language was last detected
+        self.applied = False  # Whether the block layout shows misspellings
+        self.words = None  # Counter of the block's words for corpus completion
+
+_block_ids = itertools.count()  # Shared so every SpellBlockData id is unique
+
+def block_data(block):
+    """Return the block's SpellBlockData, attaching a new one if needed"""
+    data = block.userData()
+    if not isinstance(data, SpellBlockData):
+        data = SpellBlockData(next(_block_ids))
+        block.setUserData(data)
+    return data
+
+class DocumentWordIndex:
+    """Word frequencies of one document, kept current from contentsChange deltas"""
+    clock = 0  # Edit counter shared by all documents, so recency compares across them
+    min_length = 4  # Shorter words are quicker to type than to pick
+    sync_blocks = 200  # Bigger changes are indexed over several event-loop turns
+
+    def __init__(self, document):
+        self.document = document
+        self.counts = {}  # word -> occurrences
+        self.last_seen = {}  # word -> clock tick of its latest edit
+        self.index = CompletionIndex()
+        self._block_words = {}  # block id -> Counter of that block's words
+        self._block_data = {}  # block id -> SpellBlockData, to notice deleted blocks
+        self._block_count = document.blockCount()
+        self._pending = []  # (first block, last block) ranges still to index
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._index_pending)
+        self._sweep = None  # Block ids still to check for deletion
+        self._sweep_again = False  # Blocks were deleted after the sweep started
+        self._sweep_timer = QTimer()
+        self._sweep_timer.setSingleShot(True)
+        self._sweep_timer.timeout.connect(self._sweep_step)
+        document.contentsChange.connect(self._handle_contents_change)
+        self._handle_contents_change(0, 0, document.characterCount())
+
+    def _handle_contents_change(self, position, chars_removed, chars_added):
+        """Reindex only the blocks an edit touched"""
+        document = self.document
+        first = document.findBlock(position)
+        last = document.findBlock(position + chars_added)
+        if not last.isValid():
+            last = document.lastBlock()
+        
+        # Deleted blocks take their user data with them, so when an edit
+        # spanned several old blocks, forget the ones that are gone
+        new_count = document.blockCount()
+        touched = last.blockNumber() - first.blockNumber() + 1
+        if self._block_count - new_count + touched > 1:
+            self._schedule_sweep()
+        self._block_count = new_count
+        
+        if touched <= self.sync_blocks:
+            self._index_range(first, last, time.perf_counter() + 1)
+        else:
+            self._pending.append((first, last))
+            self._timer.start(0)
+
+    def _index_range(self, block, last, deadline):
+        """Index blocks from block to last; returns where it stopped, or None"""
+        stop = last.blockNumber()
+        while block.isValid() and block.blockNumber() <= stop:
+            self._index_block(block)
+            block = block.next()
+            if time.perf_counter() > deadline:
+                return block if block.isValid() and block.blockNumber() <= stop else None
+        return None
+
+    def _index_pending(self):
+        """Index a few milliseconds' worth of a large change"""
+        deadline = time.perf_counter() + 0.005
+        while self._pending:
+            first, last = self._pending[0]
+            if not first.isValid() or not last.isValid():
+                # Edited away meanwhile; index what is left of the range
+                first = first if first.isValid() else self.document.firstBlock()
+                last = last if last.isValid() else self.document.lastBlock()
+            resume = self._index_range(first, last, deadline)
+            if resume is not None:
+                self._pending[0] = (resume, last)
+                self._timer.start(0)
+                return
+            self._pending.pop(0)
+
+    def _index_block(self, block):
+        """Replace one block's contribution to the counts"""
+        data = block_data(block)
+        text = block.text()
+        words = Counter(text[start:start + length]
+                        for start, length, script in tokenize(text)
+                        if length >= self.min_length and script != SCRIPT_COMMON)
+        old = self._block_words.get(data.block_id)
+        if words == old:
+            return
+        DocumentWordIndex.clock += 1
+        tick = DocumentWordIndex.clock
+        for word, count in words.items():
+            delta = count - (old.get(word, 0) if old else 0)
+            if delta > 0:
+                self.last_seen[word] = tick
+            if delta:
+                self._add(word, delta)
+        if old:
+            for word, count in old.items():
+                if word not in words:
+                    self._add(word, -count)
+        if words:
+            self._block_words[data.block_id] = words
+            self._block_data[data.block_id] = data
+        else:
+            self._block_words.pop(data.block_id, None)
+            self._block_data.pop(data.block_id, None)
+
+    def _schedule_sweep(self):
+        """Forget the counts of deleted blocks over the next idle turns"""
+        if self._sweep is None:
+            self._sweep = list(self._block_data)
+            self._sweep_timer.start(0)
+        else:
+            self._sweep_again = True  # Checked ids may have gone since
+
+    def _sweep_step(self):
+        """Check a few milliseconds' worth of blocks for deletion"""
+        deadline = time.perf_counter() + 0.005
+        ids = self._sweep
+        while ids:
+            block_id = ids.pop()
+            data = self._block_data.get(block_id)
+            # Qt deletes a block's user data with the block
+            if data is not None and sip.isdeleted(data):
+                del self._block_data[block_id]
+                for word, count in self._block_words.pop(block_id).items():
+                    self._add(word, -count)
+            if len(ids) % 1024 == 0 and time.perf_counter() > deadline:
+                break
+        if ids:
+            self._sweep_timer.start(0)
+            return
+        self._sweep = None
+        if self._sweep_again:
+            self._sweep_again = False
+            self._schedule_sweep()
+
+    def _add(self, word, delta):
+        """Change a word's count, keeping the prefix index in step"""
+        count = self.counts.get(word, 0) + delta
+        if count > 0:
+            if word not in self.counts:
+                self.index.add(word)
+            self.counts[word] = count
+        elif word in self.counts:
+            del self.counts[word]
+            self.last_seen.pop(word, None)
+            self.index.remove(word)
+
+    def candidates(self, prefix, limit=500):
+        """Return (word, count, edits since last typed) for words starting with prefix"""
+        clock = DocumentWordIndex.clock
+        return [(word, self.counts[word], clock - self.last_seen.get(word, 0))
+                for word in self.index.matches(prefix, limit)]
+
+class SpellCheckWorker(QThread):
+    """Checks queued blocks off the GUI thread and reports misspelling ranges"""
+    # highlighter, block id, job id, dictionary generation, ranges
+    resultReady = pyqtSignal(object, int, int, int, list)
+
+    def __init__(self, spell_service):
+        super().__init__()
+        self.spell_service = spell_service
+        self._jobs = []  # heap of (priority, sequence, owner, block id, job id, generation, text, language)
+        self._latest = {}
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+
+    def submit(self, owner, block_id, job, generation, text, priority, language=None):
+        """Queue a block; earlier queued versions of it become stale"""
+        with self._condition:
+            self._latest[(id(owner), block_id)] = (job, generation)
+            self._sequence += 1
+            heapq.heappush(self._jobs, (priority, self._sequence, owner,
+                                        block_id, job, generation, text, language))
+            self._condition.notify()
+
+    def discard(self, owner):
+        """Drop every queued job of one highlighter"""
+        with self._condition:
+            self._jobs = [job for job in self._jobs if job[2] is not owner]
+            heapq.heapify(self._jobs)
+            owner_id = id(owner)
+            self._latest = {key: value for key, value in self._latest.items()
+                            if key[0] != owner_id}
+
+    def stop(self):
+        """Ask the thread to finish and wait for it"""
+        with self._condition:
+            self._stopping = True
+            self._jobs = []
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                _, _, owner, block_id, job, generation, text, language = heapq.heappop(self._jobs)
+                key = (id(owner), block_id)
+                if self._latest.get(key) != (job, generation):
+                    continue  # A newer version of this block is queued
+                del self._latest[key]
+            
+            try:
+                ranges = self.spell_service.find_misspellings(text, language=language)
+            except Exception as e:
+                print(f"Spell check worker error: {str(e)}")
+                continue
+            self.resultReady.emit(owner, block_id, job, generation, ranges)
+
+class SuggestionWorker(QThread):
+    """Computes spelling suggestions off the GUI thread, newest request first"""
+    suggestionsReady = pyqtSignal(str, list)
+
+    def __init__(self, spell_service, max_pending=16):
+        super().__init__()
+        self.spell_service = spell_service
+        self.max_pending = max_pending
+        self._words = []  # Pending (word, language), most recently requested last
+        self._condition = threading.Condition()
+        self._stopping = False
+
+    def request(self, word, language=None):
+        """Queue word, moving it to the front if it is already waiting"""
+        with self._condition:
+            request = (word, language)
+            if request in self._words:
+                self._words.remove(request)
+            self._words.append(request)
+            del self._words[:-self.max_pending]  # Forget the oldest requests
+            self._condition.notify()
+
+    def stop(self):
+        """Ask the thread to finish and wait for it"""
+        with self._condition:
+            self._stopping = True
+            self._words = []
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._words and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                word, language = self._words.pop()
+            
+            try:
+                suggestions = self.spell_service.suggest(word, language)
+            except Exception as e:
+                print(f"Suggestion worker error: {str(e)}")
+                continue
+            self.suggestionsReady.emit(word, suggestions)
+
+class SpellCheckService:
+    """Process-wide spell checker shared by every tab, highlighter and text edit"""
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Return the shared service, creating it on first use"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.USE_ENCHANT = USE_ENCHANT
+        self.languages = ['en_US']  # The first one is used when detection is unsure
+        self._spells = {}  # language -> backend, loaded lazily on first lookup
+        self._listeners = []
+        self._lock = threading.RLock()  # Backends are shared with the worker threads
+        self._load_lock = threading.Lock()
+        self._worker = None
+        self._suggestion_worker = None
+        self._quit_connected = False
+        self.verdict_cache = WordVerdictCache()
+        self.suggestion_cache = WordVerdictCache(maxsize=500)  # (language, word) -> suggestions
+        self.user_dictionary = None  # UserDictionary, shared with the worker
+        self.generation = 0  # Bumped whenever the dictionary changes
+        self.cache_dir = None  # Where verdicts are kept between sessions
+        self._warmed_languages = set()
+
+    @property
+    def spell(self):
+        """Enchant Dict or pyspellchecker instance of the default language"""
+        return self.spell_for(self.default_language)
+
+    @property
+    def worker(self):
+        """Background spell-check thread, started on first use"""
+        if self._worker is None:
+            self._worker = SpellCheckWorker(self)
+            self._worker.resultReady.connect(self._deliver)
+            self._shutdown_on_quit()
+            self._worker.start()
+        return self._worker
+
+    @property
+    def suggestion_worker(self):
+        """Background suggestion thread, started on first use"""
+        if self._suggestion_worker is None:
+            self._suggestion_worker = SuggestionWorker(self)
+            self._shutdown_on_quit()
+            self._suggestion_worker.start()
+        return self._suggestion_worker
+
+    def _shutdown_on_quit(self):
+        """Run shutdown once when the application quits"""
+        app = QApplication.instance()
+        if app and not self._quit_connected:
+            app.aboutToQuit.connect(self.shutdown)
+            self._quit_connected = True
+
+    def shutdown(self):
+        """Stop the background workers and save verdicts for the next session"""
+        self.save_cache()
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+        if self._suggestion_worker is not None:
+            self._suggestion_worker.stop()
+            self._suggestion_worker = None
+
+    def discard(self, owner):
+        """Drop the queued spell checks of a highlighter that is going away"""
+        if self._worker is not None:
+            self._worker.discard(owner)
+
+    def _deliver(self, owner, block_id, job, generation, ranges):
+        """Hand worker results to their highlighter on the GUI thread"""
+        try:
+            owner.apply_misspellings(block_id, job, generation, ranges)
+        except RuntimeError:
+            pass  # Highlighter was deleted while the job was queued
+
+    def set_user_dictionary(self, user_dictionary):
+        """Use user_dictionary to accept words the backend does not know"""
+        self.user_dictionary = user_dictionary
+
+    def set_cache_dir(self, cache_dir):
+        """Keep verdicts in cache_dir between sessions"""
+        self.cache_dir = cache_dir
+
+    def _backend_id(self, language):
+        """Describe the backend that checks language, without loading it"""
+        if self.USE_ENCHANT:
+            for tag, provider in Broker().list_dicts():
+                if tag == language:
+                    return f"enchant {provider.name} {provider.file}"
+        import spellchecker
+        return f"pyspellchecker {spellchecker.__version__}"
+
+    def _fingerprint(self, language):
+        """Hash everything a verdict depends on, so any change invalidates saved ones"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self._backend_id(language)}\n{language}\n".encode('utf-8'))
+        for word in sorted(self.user_dictionary or ()):
+            digest.update(word.encode('utf-8') + b'\n')
+        return digest.digest()
+
+    def _cache_path(self, language):
+        return os.path.join(self.cache_dir, f"{language}.bin")
+
+    def _warm_cache(self, language):
+        """Load the verdicts an earlier session saved for language"""
+        self._warmed_languages.add(language)
+        if not self.cache_dir:
+            return
+        try:
+            verdicts = load_verdicts(self._cache_path(language), self._fingerprint(language))
+        except Exception as e:
+            print(f"Error loading spell cache: {str(e)}")
+            return
+        for word, verdict in verdicts:
+            self.verdict_cache.put((language, word), verdict)
+
+    def save_cache(self):
+        """Save cached verdicts, one file per language"""
+        if not self.cache_dir:
+            return
+        with self._lock:
+            by_language = {}
+            for (language, word), verdict in self.verdict_cache.items():
+                by_language.setdefault(language, []).append((word, verdict))
+            try:
+                fingerprints = {language: self._fingerprint(language)
+                                for language in by_language}
+            except Exception as e:
+                print(f"Error saving spell cache: {str(e)}")
+                return
+        for language, verdicts in by_language.items():
+            save_verdicts(self._cache_path(language), fingerprints[language], verdicts)
+
+    def set_languages(self, languages):
+        """Set the languages blocks may be checked in; the first is the default"""
+        languages = [language for language in languages if language] or ['en_US']
+        with self._lock:
+            if languages == self.languages:
+                return
+            self.languages = languages
+            self.verdict_cache.clear()
+            self.suggestion_cache.clear()
+            self._warmed_languages.clear()
+            self.generation += 1
+        self._notify()
+
+    @property
+    def default_language(self):
+        return self.languages[0]
+
+    def spell_for(self, language=None):
+        """Return the backend for language, loading it on first use"""
+        language = language or self.default_language
+        spell = self._spells.get(language)
+        if spell is None:
+            # Loading takes a while, so only hold up other loads, not lookups
+            with self._load_lock:
+                spell = self._spells.get(language)
+                if spell is None:
+                    spell = self._load_backend(language)
+                    self._spells[language] = spell
+        if spell is False:
+            if language == self.default_language:
+                raise RuntimeError(f"No spell checker available for {language}")
+            return self.spell_for(self.default_language)
+        return spell
+
+    def _load_backend(self, language):
+        """Load the dictionary for language, preferring enchant; False if unavailable"""
+        if self.USE_ENCHANT:
+            try:
+                spell = Dict(language)
+                print(f"Using Enchant for spell checking ({language})")
+                return spell
+            except Exception as e:
+                print(f"Spell checker initialization error: {str(e)}, falling back to pyspellchecker")
+        try:
+            from spellchecker import SpellChecker
+            spell = SpellChecker(language=language.split('_')[0])
+        except Exception as e:
+            print(f"Could not load {language} dictionary: {str(e)}")
+            return False
+        print(f"Using pyspellchecker for spell checking ({language})")
+        return spell
+
+    def _is_enchant(self, spell):
+        """Whether spell is an enchant Dict rather than a pyspellchecker instance"""
+        return self.USE_ENCHANT and isinstance(spell, Dict)
+
+    def check(self, word, language=None):
+        """Check if a word is spelled correctly in language"""
+        key = (language or self.default_language, word)
+        with self._lock:
+            if key[0] not in self._warmed_languages:
+                self._warm_cache(key[0])
+            verdict = self.verdict_cache.get(key)
+        if verdict is not None:
+            return verdict
+        
+        spell = self.spell_for(language)
+        with self._lock:
+            if self._is_enchant(spell):
+                verdict = spell.check(word)
+            else:
+                # pyspellchecker considers unknown words misspelled
+                verdict = word.lower() in spell
+            self.verdict_cache.put(key, verdict)
+        return verdict
+
+    def cached_check(self, word, language=None):
+        """Return the cached verdict for word, or None without asking the backend"""
+        language = language or self.default_language
+        with self._lock:
+            if language not in self._warmed_languages:
+                self._warm_cache(language)
+            return self.verdict_cache.get((language, word))
+
+    def find_misspellings(self, text, cached_only=False, language=None):
+        """Return (start, length, word) for every misspelled word in text
+
+        Words are checked against the dictionary of language only. With
+        cached_only, give up and return None at the first word that has
+        no cached verdict instead of asking the backend.
+        """
+        user_dictionary = self.user_dictionary or ()
+        check = self.cached_check if cached_only else self.check
+        misspellings = []
+        for start, length, script in tokenize(text):
+            # Only spell check Latin words not in the user dictionary
+            if script != SCRIPT_LATIN:
+                continue
+            word = text[start:start + length]
+            if word in user_dictionary:
+                continue
+            verdict = check(word, language)
+            if verdict is None:
+                return None
+            if not verdict:
+                misspellings.append((start, length, word))
+        return misspellings
+
+    def suggest(self, word, language=None):
+        """Get backend suggestions for a word, computing them if not cached"""
+        suggestions = self.cached_suggestions(word, language)
+        if suggestions is not None:
+            return suggestions
+        
+        generation = self.generation
+        spell = self.spell_for(language)
+        if self._is_enchant(spell):
+            with self._lock:
+                suggestions = spell.suggest(word) or []
+        else:
+            # candidates() only reads the word list, so its slow edit-distance
+            # search runs without holding up spell checks
+            suggestions = list(spell.candidates(word) or [])
+        
+        with self._lock:
+            if generation == self.generation:
+                self.suggestion_cache.put((language or self.default_language, word),
+                                          suggestions)
+        return suggestions
+
+    def cached_suggestions(self, word, language=None):
+        """Return cached backend suggestions for word, or None"""
+        with self._lock:
+            return self.suggestion_cache.get((language or self.default_language, word))
+
+    def request_suggestions(self, word, language=None):
+        """Compute suggestions for word in the background unless cached"""
+        if self.cached_suggestions(word, language) is None:
+            self.suggestion_worker.request(word, language)
+
+    def _loaded_backends(self):
+        """Return every dictionary loaded so far"""
+        return [spell for spell in self._spells.values() if spell]
+
+    def add(self, word):
+        """Add word to every loaded backend dictionary and notify consumers"""
+        self.update_words(added=[word])
+
+    def remove(self, word):
+        """Remove a previously added word and notify consumers"""
+        self.update_words(removed=[word])
+
+    def update_words(self, added=(), removed=()):
+        """Add and remove several words, then notify consumers once"""
+        if not added and not removed:
+            return
+        with self._lock:
+            for spell in self._loaded_backends():
+                for word in removed:
+                    if self._is_enchant(spell):
+                        if spell.is_added(word):
+                            spell.remove(word)
+                    else:
+                        spell.word_frequency.remove(word)
+                for word in added:
+                    if self._is_enchant(spell):
+                        spell.add(word)
+                    else:
+                        spell.word_frequency.add(word)
+            self.verdict_cache.clear()
+            self.suggestion_cache.clear()
+            self.generation += 1
+        self._notify()
+
+    def add_listener(self, callback):
+        """Call callback whenever the dictionary changes"""
+        self._listeners.append(weakref.WeakMethod(callback))
+
+    def _notify(self):
+        """Tell every live consumer that the dictionary changed"""
+        alive = []
+        for ref in self._listeners:
+            callback = ref()
+            if callback is None:
+                continue
+            try:
+                callback()
+            except RuntimeError:
+                continue  # Underlying Qt object was deleted
+            alive.append(ref)
+        self._listeners = alive
+
 class SpellCheckHighlighter(QSyntaxHighlighter):
     def __init__(self, parent, settings_manager):
         super().__init__(parent)
         self.settings_manager = settings_manager
         self.spell_check_enabled = True
-        self.USE_ENCHANT = USE_ENCHANT  # Store the global flag
-        
-        try:
-            if self.USE_ENCHANT:
-                self.spell = Dict("en_US")
-                print("Using Enchant for spell checking")
-            else:
-                self.spell = SpellChecker()
-                print("Using pyspellchecker for spell checking")
-        except Exception as e:
-            print(f"Spell checker initialization error: {str(e)}, falling back to pyspellchecker")
-            self.spell = SpellChecker()
-            self.USE_ENCHANT = False
+        self.spell_service = SpellCheckService.instance()
+        self.spell_service.verdict_cache.resize(
+            self.settings_manager.get_setting('spell_cache_size', 20000))
+        self.spell_service.set_user_dictionary(self.settings_manager.user_dictionary)
+        self.spell_service.set_languages(
+            self.settings_manager.get_setting('spell_languages', ['en_US']))
+        self.spell_service.set_cache_dir(
+            os.path.join(self.settings_manager.config_dir, 'spell_cache'))
+        self.language_redetect_chars = 20  # Text change that triggers a new detection
+        self.spell_service.add_listener(self.handle_dictionary_changed)
+        
+        self.misspelled_format = QTextCharFormat()
+        self.misspelled_format.setUnderlineColor(Qt.red)
+        self.misspelled_format.setUnderlineStyle(QTextCharFormat.SpellCheckUnderline)
+        
+        self._next_job = 0
+        # block id -> (block, revision, generation, length, job id) awaiting the worker
+        self._pending = {}
+        self._finished_blocks = []
+        self._flush_scheduled = False
+        self.visible_blocks = (0, 0)
+        
+        # Large documents only check blocks near the viewport up front and
+        # fill in the rest from an idle timer
+        self.large_document_threshold = self.settings_manager.get_setting(
+            'large_document_threshold', 1000000)
+        self.viewport_margin = 50  # Blocks above and below the view checked eagerly
+        self.inline_check_limit = 2000  # Longest block checked inline from the cache
+        self.inline_blocks_per_turn = 8  # Typing touches a block or two, pastes many
+        self._inline_checks = 0
+        self.fill_queue_limit = 256  # Max jobs the idle filler keeps in flight
+        self._fill_position = None
+        self._fill_timer = QTimer(self)
+        self._fill_timer.setInterval(5)
+        self._fill_timer.timeout.connect(self._fill_step)
+        parent.contentsChange.connect(self._handle_contents_change)
+
+    @property
+    def USE_ENCHANT(self):
+        return self.spell_service.USE_ENCHANT
+
+    @property
+    def spell(self):
+        return self.spell_service.spell
+
+    def handle_dictionary_changed(self):
+        """Recheck the document after a word was added or removed"""
+        self.rehighlight()
+        if self.settings_manager.get_setting('debug_spell_stats', False):
+            print(f"Spell cache: {self.spell_service.verdict_cache.stats()}")
 
     def check_word(self, word):
         """Check if a word is spelled correctly"""
         if not self.spell_check_enabled:
             return True
             
-        if self.USE_ENCHANT:
-            return self.spell.check(word)
-        else:
-            # pyspellchecker considers unknown words misspelled
-            return word.lower() in self.spell
+        return self.spell_service.check(word)
 
-    def suggest(self, word):
+    def suggest(self, word, language=None):
         """Get suggestions for a word"""
         if not self.spell_check_enabled:
             return []
             
-        # Get user dictionary
-        user_dict = self.settings_manager.get_setting('user_dictionary', [])
-        
-        # Add matching words from user dictionary first
-        suggestions = [dict_word for dict_word in user_dict 
-                      if dict_word.lower().startswith(word.lower())]
+        spell_suggestions = []
         
         # Only get spell checker suggestions for Latin words
         if self.is_latin_word(word):
             try:
-                if self.USE_ENCHANT:
-                    spell_suggestions = self.spell.suggest(word)
-                else:
-                    spell_suggestions = self.spell.candidates(word)
-                
-                if spell_suggestions:
-                    # Remove the word itself from suggestions
-                    spell_suggestions = [s for s in spell_suggestions 
-                                      if s.lower() != word.lower()]
-                    suggestions.extend(spell_suggestions)
+                spell_suggestions = self.spell_service.suggest(word, language)
             except UnicodeEncodeError:
                 pass
         
+        return self.merge_suggestions(word, spell_suggestions)
+
+    def cached_suggestions(self, word, language=None):
+        """Get suggestions for a word if ready, else None
+
+        A miss queues the word so the background worker computes it.
+        """
+        if not self.spell_check_enabled:
+            return []
+        
+        spell_suggestions = []
+        if self.is_latin_word(word):
+            spell_suggestions = self.spell_service.cached_suggestions(word, language)
+            if spell_suggestions is None:
+                self.spell_service.request_suggestions(word, language)
+                return None
+        
+        return self.merge_suggestions(word, spell_suggestions)
+
+    def merge_suggestions(self, word, spell_suggestions):
+        """Combine user dictionary matches with backend suggestions"""
+        # Add matching words from user dictionary first
+        suggestions = self.settings_manager.user_dictionary.prefix_matches(word)
+        
+        # Remove the word itself from suggestions
+        suggestions.extend(s for s in spell_suggestions if s.lower() != word.lower())
+        
         # Remove duplicates while preserving order
         return list(dict.fromkeys(suggestions))
 
+    def prefetch_suggestions(self, cursor, limit=4):
+        """Compute suggestions in the background for misspellings near cursor"""
+        if not self.spell_check_enabled:
+            return
+        
+        block = cursor.block()
+        position = cursor.position()
+        nearby = []
+        for candidate in (block.previous(), block, block.next()):
+            if not candidate.isValid():
+                continue
+            data = candidate.userData()
+            if not isinstance(data, SpellBlockData) or not self._is_current(candidate, data):
+                continue
+            for start, length, word in data.misspellings:
+                word_start = candidate.position() + start
+                distance = max(word_start - position, position - word_start - length, 0)
+                nearby.append((distance, word, data.language))
+        
+        # The worker takes the most recent request first, so queue the
+        # nearest word last
+        nearby.sort(key=lambda item: item[0])
+        for _, word, language in reversed(nearby[:limit]):
+            self.spell_service.request_suggestions(word, language)
+
+    def block_language(self, block, text=None):
+        """Return the language block is checked in, detecting it if needed"""
+        data = self._block_data(block)
+        stamp = (block.revision(), block.length())
+        if data.language_stamp == stamp:
+            return data.language
+        
+        if text is None:
+            text = block.text()
+        # Typing a few characters rarely changes a paragraph's language, so
+        # only detect again once the text has changed noticeably
+        languages = self.spell_service.languages
+        if (data.language not in languages
+                or abs(len(text) - data.language_length) >= self.language_redetect_chars):
+            previous = block.previous().userData()
+            data.language = resolve_language(
+                text, languages, previous.language if isinstance(previous, SpellBlockData) else None)
+            data.language_length = len(text)
+        data.language_stamp = stamp
+        return data.language
+
     def add_to_dictionary(self, word):
         """Add word to user dictionary"""
-        if self.USE_ENCHANT:
-            # Enchant spell checker implementation
-            self.spell.add(word)
-        else:
-            # PySpellChecker implementation
-            self.spell.word_frequency.add(word)
-            # Force a recheck of the document
-            self.highlighter.rehighlight()
+        self.settings_manager.user_dictionary.add(word)
         
-        # Add to user dictionary in settings
-        user_dict = self.settings_manager.get_setting('user_dictionary', [])
-        if word not in user_dict:
-            user_dict.append(word)
-            self.settings_manager.save_setting('user_dictionary', user_dict)
+        # Reaches every highlighter through the shared service
+        self.spell_service.add(word)
+
+    def set_enabled(self, enabled):
+        """Turn checking off, or back on and check the document again"""
+        self.spell_check_enabled = enabled
+        if not enabled:
+            return
+        if self.is_large_document():
+            # Viewport first, the rest from the idle filler
+            self._queue_visible_blocks()
+            self._schedule_fill(0)
+        else:
+            self.rehighlight()
+
+    def set_visible_blocks(self, first, last):
+        """Record which block numbers are on screen so they are checked first"""
+        self.visible_blocks = (first, last)
+        if self.spell_check_enabled and self.is_large_document():
+            self._queue_visible_blocks()
+
+    def is_idle(self):
+        """Whether every queued block has been checked and repainted"""
+        return (not self._pending and not self._finished_blocks
+                and not self._flush_scheduled and self._fill_position is None)
+
+    def is_large_document(self):
+        """Whether the document is big enough for viewport-first checking"""
+        document = self.document()
+        return document is not None and document.characterCount() > self.large_document_threshold
+
+    def _near_view(self, block_number):
+        """Whether a block is on screen or within the eager margin around it"""
+        first, last = self.visible_blocks
+        return first - self.viewport_margin <= block_number <= last + self.viewport_margin
+
+    def block_priority(self, block_number):
+        """Queue priority of a block: 0 when visible, else distance from view"""
+        first, last = self.visible_blocks
+        if block_number < first:
+            return first - block_number
+        if block_number > last:
+            return block_number - last
+        return 0
 
     def highlightBlock(self, text):
         if not self.spell_check_enabled:
             return
 
-        # Get user dictionary
-        user_dict = self.settings_manager.get_setting('user_dictionary', [])
+        block = self.currentBlock()
+        data = self._block_data(block)
+        current = self._is_current(block, data)
+        
+        # Keep showing old underlines whose word is still in place until the
+        # worker reports back, so typing does not make them flicker
+        for start, length, word in data.misspellings:
+            if current or self._still_matches(text, start, length, word):
+                self.setFormat(start, length, self.misspelled_format)
+        
+        data.applied = current
+        if current:
+            return
+        
+        # Typing mostly reuses known words, so skip the worker round trip
+        # (and the extra layout pass it costs) when the cache has them all
+        if (len(text) <= self.inline_check_limit
+                and self._inline_checks < self.inline_blocks_per_turn):
+            if self._inline_checks == 0:
+                QTimer.singleShot(0, self._reset_inline_checks)
+            self._inline_checks += 1
+            misspellings = self.spell_service.find_misspellings(
+                text, cached_only=True, language=self.block_language(block, text))
+            if misspellings is not None:
+                data.revision = block.revision()
+                data.length = block.length()
+                data.generation = self.spell_service.generation
+                data.misspellings = misspellings
+                data.applied = True
+                for start, length, _ in misspellings:
+                    self.setFormat(start, length, self.misspelled_format)
+                return
         
-        format = QTextCharFormat()
-        format.setUnderlineColor(Qt.red)
-        format.setUnderlineStyle(QTextCharFormat.SpellCheckUnderline)
+        if self.is_large_document() and not self._near_view(block.blockNumber()):
+            self._schedule_fill(block.position())
+            return
+        self._queue_block(block, data, text, self.block_priority(block.blockNumber()))
 
-        # For each word in the text
-        expression = QRegExp("\\b\\w+\\b")
-        index = expression.indexIn(text)
-        while index >= 0:
-            word = expression.cap()
-            length = len(word)
-            
-            # Only spell check Latin words
-            if self.is_latin_word(word):
-                # Check if word is in user dictionary first
-                if word not in user_dict:
-                    try:
-                        if not self.check_word(word):
-                            self.setFormat(index, length, format)
-                    except UnicodeEncodeError:
-                        pass  # Skip words that can't be encoded
-            
-            index = expression.indexIn(text, index + length)
+    def _reset_inline_checks(self):
+        """Start a new event-loop turn's allowance of inline checks"""
+        self._inline_checks = 0
+
+    def _block_data(self, block):
+        """Return the block's SpellBlockData, attaching a new one if needed"""
+        return block_data(block)
+
+    def _queue_block(self, block, data, text, priority):
+        """Send a block to the worker unless that revision is already queued"""
+        revision = block.revision()
+        length = block.length()
+        generation = self.spell_service.generation
+        if not text:
+            data.revision, data.length, data.generation = revision, length, generation
+            data.misspellings = []
+            return
+        pending = self._pending.get(data.block_id)
+        if pending is not None and pending[1:4] == (revision, generation, length):
+            return
+        # Job ids tell apart texts setPlainText() gives the same revision
+        self._next_job += 1
+        self._pending[data.block_id] = (block, revision, generation, length, self._next_job)
+        self.spell_service.worker.submit(self, data.block_id, self._next_job, generation,
+                                         text, priority, self.block_language(block, text))
+
+    def _is_current(self, block, data):
+        """Whether stored results match the block text and dictionary"""
+        return (data.revision == block.revision()
+                and data.length == block.length()
+                and data.generation == self.spell_service.generation)
+
+    def _queue_visible_blocks(self):
+        """Queue unchecked blocks in and around the viewport ahead of the rest"""
+        document = self.document()
+        first, last = self.visible_blocks
+        block = document.findBlockByNumber(max(0, first - self.viewport_margin))
+        end = last + self.viewport_margin
+        while block.isValid() and block.blockNumber() <= end:
+            data = self._block_data(block)
+            if not self._is_current(block, data):
+                self._queue_block(block, data, block.text(), 0)
+            elif not data.applied:
+                self._finish_block(block)  # Checked while off screen
+            block = block.next()
+
+    def _schedule_fill(self, position):
+        """Make the idle filler (re)visit everything from position onward"""
+        if self._fill_position is None or position < self._fill_position:
+            self._fill_position = position
+        if not self._fill_timer.isActive():
+            self._fill_timer.start()
+
+    def _handle_contents_change(self, position, chars_removed, chars_added):
+        """Keep the idle filler behind edits made in large documents"""
+        if self._fill_position is not None and position < self._fill_position:
+            self._fill_position = position
+
+    def _fill_step(self):
+        """Queue a few milliseconds' worth of off-screen blocks"""
+        document = self.document()
+        if document is None or self._fill_position is None or not self.spell_check_enabled:
+            self._fill_position = None
+            self._fill_timer.stop()
+            return
+        if len(self._pending) >= self.fill_queue_limit:
+            return  # Let the worker catch up first
+        
+        deadline = time.perf_counter() + 0.004
+        block = document.findBlock(self._fill_position)
+        while (block.isValid() and len(self._pending) < self.fill_queue_limit
+               and time.perf_counter() < deadline):
+            data = self._block_data(block)
+            if not self._is_current(block, data):
+                self._queue_block(block, data, block.text(),
+                                  self.block_priority(block.blockNumber()))
+            block = block.next()
+        
+        if block.isValid():
+            self._fill_position = block.position()
+        else:
+            self._fill_position = None
+            self._fill_timer.stop()
+
+    def _still_matches(self, text, start, length, word):
+        """Check that word still sits, whole, at start in text"""
+        end = start + length
+        if text[start:end] != word:
+            return False
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        return end >= len(text) or not text[end].isalnum()
+
+    def apply_misspellings(self, block_id, job, generation, misspellings):
+        """Store worker results on their block and repaint it"""
+        pending = self._pending.get(block_id)
+        if pending is None or pending[4] != job:
+            return  # A newer version of the block is still queued
+        del self._pending[block_id]
+        
+        block, revision, _, length, _ = pending
+        if not block.isValid() or block.revision() != revision or block.length() != length:
+            return
+        if generation != self.spell_service.generation:
+            return
+        data = block.userData()
+        if not isinstance(data, SpellBlockData) or data.block_id != block_id:
+            return
+        
+        data.revision = revision
+        data.length = length
+        data.generation = generation
+        data.misspellings = misspellings
+        data.applied = False
+        
+        # Every repaint relays out the document from the block on, which is
+        # slow for huge documents, so off-screen blocks wait until scrolled to
+        if self.is_large_document() and not self._near_view(block.blockNumber()):
+            return
+        self._finish_block(block)
+
+    def _finish_block(self, block):
+        """Schedule a checked block for repainting"""
+        # Results arrive in bursts; repaint them together on a later turn
+        self._finished_blocks.append(block)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(50 if self.is_large_document() else 0,
+                              self._flush_finished_blocks)
+
+    def _flush_finished_blocks(self):
+        """Repaint every block that received results in as few passes as possible"""
+        self._flush_scheduled = False
+        blocks, self._finished_blocks = self._finished_blocks, []
+        document = self.document()
+        if document is None:
+            return
+        
+        # rehighlightBlock() relays out the rest of the document for every
+        # block, so set the formats directly and mark each contiguous run
+        # dirty once. Formatting is not an edit, so textChanged stays quiet.
+        runs = []
+        for block in sorted(blocks, key=lambda b: b.position()):
+            data = block.userData()
+            if (not block.isValid() or not isinstance(data, SpellBlockData)
+                    or data.revision != block.revision()
+                    or data.length != block.length()):
+                continue
+            block.layout().setFormats(self._format_ranges(data.misspellings))
+            data.applied = True
+            start, end = block.position(), block.position() + block.length()
+            if runs and start <= runs[-1][1]:
+                runs[-1][1] = max(runs[-1][1], end)
+            else:
+                runs.append([start, end])
+        
+        document.blockSignals(True)
+        try:
+            for start, end in runs:
+                document.markContentsDirty(start, end - start)
+        finally:
+            document.blockSignals(False)
+
+    def _format_ranges(self, misspellings):
+        """Build layout format ranges matching what highlightBlock applies"""
+        ranges = []
+        for start, length, _ in misspellings:
+            format_range = QTextLayout.FormatRange()
+            format_range.start = start
+            format_range.length = length
+            format_range.format = self.misspelled_format
+            ranges.append(format_range)
+        return ranges
 
     def is_latin_word(self, word):
         """Check if word contains only Latin characters"""
-        try:
-            word.encode('latin-1')
-            return True
-        except UnicodeEncodeError:
-            return False
+        return is_latin_word(word)
 
 class CustomTextEdit(QTextEdit):
     def __init__(self, parent=None):
@@ -186,6 +1181,7 @@ class CustomTextEdit(QTextEdit):
                 tc = self.textCursor()
                 tc.movePosition(tc.Left, tc.KeepAnchor, len(completion))
                 tc.insertText(snippet_content)
+                self.parent_tab.snippet_manager.record_use(completion)
 
     def keyPressEvent(self, event):
         if self.completer and self.completer.popup().isVisible():
@@ -206,6 +1202,58 @@ class CustomTextEdit(QTextEdit):
                 
         super().keyPressEvent(event)
 
+class SuggestionPopup(QListView):
+    """Completion popup that stays alive; typing only changes its rows and position"""
+    suggestionClicked = pyqtSignal(int)
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.setWindowFlags(Qt.ToolTip)
+        self.setModel(QStringListModel(self))
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setUniformItemSizes(True)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setCursor(Qt.PointingHandCursor)
+        self.setStyleSheet("""
+            QListView {
+                background-color: palette(window);
+                border: 1px solid palette(mid);
+                border-radius: 3px;
+                padding: 2px;
+                color: palette(text);
+                font-family: "Courier New", "DejaVu Sans Mono", monospace;
+            }
+            QListView::item {
+                padding: 2px 8px;
+                border-radius: 2px;
+            }
+            QListView::item:selected {
+                background-color: palette(highlight);
+                color: palette(highlighted-text);
+            }
+        """)
+        self.clicked.connect(lambda index: self.suggestionClicked.emit(index.row()))
+
+    def set_rows(self, rows):
+        """Replace the rows and shrink or grow to fit them"""
+        self.model().setStringList(rows)
+        self.clearSelection()
+        frame = 2 * self.frameWidth()
+        width = max(self.sizeHintForColumn(0), 60) + frame + 4
+        height = self.sizeHintForRow(0) * len(rows) + frame + 4 if rows else 0
+        self.setFixedSize(width, height)
+
+    def select_row(self, row):
+        """Highlight one row, or none for a negative row"""
+        if row < 0:
+            self.clearSelection()
+            return
+        self.selectionModel().setCurrentIndex(self.model().index(row),
+                                              QItemSelectionModel.ClearAndSelect)
+
 class CompletingTextEdit(QTextEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -214,22 +1262,17 @@ class CompletingTextEdit(QTextEdit):
         self.completion_start = None
         self.suppress_completion = False
         
-        # Initialize spell checker
-        if USE_ENCHANT:
-            try:
-                self.spell_checker = Dict("en_US")
-            except:
-                self.spell_checker = SpellChecker()
-                print("Fallback to pyspellchecker in CompletingTextEdit")
-        else:
-            self.spell_checker = SpellChecker()
+        # Share the process-wide spell checker
+        self.spell_checker = SpellCheckService.instance()
 
     def keyPressEvent(self, event):
         """Handle key events"""
         # Handle suggestion navigation if parent has suggestions
-        if (self.parent_tab and 
-            self.parent_tab.suggestion_tooltip and 
-            self.parent_tab.current_suggestions):
+        if self.parent_tab and event.key() in (Qt.Key_Down, Qt.Key_Up, Qt.Key_Return,
+                                               Qt.Key_Enter, Qt.Key_Tab, Qt.Key_Escape):
+            # Keys act on the suggestions for what is typed now, not a stale list
+            self.parent_tab.flush_completions()
+        if self.parent_tab and self.parent_tab.suggestions_visible():
             
             if event.key() == Qt.Key_Down:
                 self.parent_tab.select_next_suggestion()
@@ -325,40 +1368,37 @@ class CompletingTextEdit(QTextEdit):
         self.editor.setFocus()
 
 class EditorTab(QWidget):
+    # A background load was cancelled or failed, leaving the tab empty
+    loadStopped = pyqtSignal()
+
     def __init__(self, snippet_manager, settings_manager):
         super().__init__()
         self.snippet_manager = snippet_manager
         self.settings_manager = settings_manager
         self.current_file = None
+        self.encoding = 'utf-8'  # What the file was read in and is saved back in
+        self.save_error = None  # Why the last save failed
+        self.file_loader = None  # Reads a large file in the background
+        self._load_tail = []  # Loaded text of a line not complete yet
+        self.loading = False
         self.current_font = self.settings_manager.get_font()
         self.web_view = None  # Initialize to None
         self.main_window = None  # Initialize main_window to None
         
-        # Add USE_ENCHANT as instance attribute
-        self.USE_ENCHANT = USE_ENCHANT  # Use the module-level variable
-        
-        # Initialize spell checker
-        if self.USE_ENCHANT:
-            try:
-                self.spell_checker = Dict("en_US")
-            except:
-                self.USE_ENCHANT = False  # Fall back if enchant fails
-                self.spell_checker = SpellChecker()
-                print("Fallback to pyspellchecker in EditorTab")
-        else:
-            self.spell_checker = SpellChecker()
+        # Share the process-wide spell checker
+        self.spell_checker = SpellCheckService.instance()
         
         # Setup UI components
         self.setup_ui()
         
-        # Setup autosave after UI is ready
-        self.last_save_time = time.time()
+        # Setup autosave after UI is ready; the main window's scheduler saves
         self.changes_pending = False
-        
-        # Start periodic backup timer
-        self.backup_timer = QTimer()
-        self.backup_timer.timeout.connect(self.force_save)
-        self.backup_timer.start(5000)  # Backup every 5 seconds
+        self.recovery_id = uuid.uuid4().hex  # Key of this tab in the session database
+        self.last_autosave_checksum = None
+        self.last_autosave_revision = None  # Document revision the writer last got
+        self.edit_journal = EditJournal(self.editor.document())
+        self.last_checkpoint_time = 0
+        self.editor.textChanged.connect(self.on_text_changed)
         
         # Apply theme
         ThemeManager.apply_theme(self.editor, self.settings_manager.get_theme())
@@ -376,9 +1416,25 @@ class EditorTab(QWidget):
         
         self.focus_mode = False
         self.panes_opened_in_focus = {'browser': False, 'snippets': False}  # Track panes opened during focus mode
-        self.suggestion_tooltip = None
+        self.suggestion_popup = SuggestionPopup(self.editor)
+        self.suggestion_popup.suggestionClicked.connect(
+            lambda row: self.apply_suggestion(self.current_suggestions[row][1]))
         self.selected_suggestion_index = -1
         self.current_suggestions = []
+        
+        # Completion runs once typing pauses, so fast typing skips stale work
+        self.completion_limit = 7  # All the popup shows
+        self.word_index = DocumentWordIndex(self.editor.document())
+        self.completion_providers = [
+            SnippetCompletionProvider(self.snippet_manager),
+            DictionaryCompletionProvider(self.settings_manager.user_dictionary),
+            CorpusCompletionProvider(self.corpus_word_indexes)
+        ]
+        self.completion_timer = QTimer(self)
+        self.completion_timer.setSingleShot(True)
+        self.completion_timer.setInterval(
+            self.settings_manager.get_setting('completion_delay_ms', 40))
+        self.completion_timer.timeout.connect(self.update_completions)
         self.editor.textChanged.connect(self.handle_text_changed)
 
     def setup_ui(self):
@@ -395,11 +1451,24 @@ class EditorTab(QWidget):
         self.editor.customContextMenuRequested.connect(self.show_context_menu)
         self.update_font(self.current_font)
         
-        # Connect text changed signal to update status
-        self.editor.textChanged.connect(self.update_status)
+        # Update status once typing pauses; counting words is O(document)
+        self.status_timer = QTimer(self)
+        self.status_timer.setSingleShot(True)
+        self.status_timer.setInterval(200)
+        self.status_timer.timeout.connect(self.update_status)
+        self.editor.textChanged.connect(self.status_timer.start)
         
         # Create spell checker
         self.highlighter = SpellCheckHighlighter(self.editor.document(), self.settings_manager)
+        self.editor.verticalScrollBar().valueChanged.connect(self.update_visible_blocks)
+        
+        # Precompute suggestions for nearby misspellings once the cursor rests
+        self.suggestion_prefetch_timer = QTimer(self)
+        self.suggestion_prefetch_timer.setSingleShot(True)
+        self.suggestion_prefetch_timer.setInterval(300)
+        self.suggestion_prefetch_timer.timeout.connect(
+            lambda: self.highlighter.prefetch_suggestions(self.editor.textCursor()))
+        self.editor.cursorPositionChanged.connect(self.suggestion_prefetch_timer.start)
         
         # Add editor to splitter
         self.splitter.addWidget(self.editor)
@@ -593,80 +1662,124 @@ class EditorTab(QWidget):
         
         layout.addWidget(self.find_toolbar)
         
+        # Progress of a file loading in the background (initially hidden)
+        self.load_bar = QWidget(self)
+        self.load_bar.setVisible(False)
+        self.load_bar.setFixedHeight(32)
+        load_layout = QHBoxLayout(self.load_bar)
+        load_layout.setContentsMargins(4, 2, 4, 2)
+        load_layout.setSpacing(4)
+        self.load_label = QLabel("Loading...")
+        load_layout.addWidget(self.load_label)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 1000)
+        self.load_progress.setFixedHeight(16)
+        load_layout.addWidget(self.load_progress)
+        load_cancel_btn = QPushButton("Cancel")
+        load_cancel_btn.setFixedHeight(24)
+        load_cancel_btn.clicked.connect(self.cancel_loading)
+        load_layout.addWidget(load_cancel_btn)
+        layout.addWidget(self.load_bar)
+        
+        # Loaded text goes in from a zero-delay timer, a few ms per turn
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(0)
+        self.load_timer.timeout.connect(self._insert_loaded_chunks)
+        
     def on_text_changed(self):
         """Handle text changes"""
         if not hasattr(self, 'main_window') or not self.main_window:
             return  # Don't autosave if not properly initialized
+        if self.loading:
+            return  # Autosaved once the whole file is in
             
         self.changes_pending = True
-        current_time = time.time()
-        
-        # Save if it's been more than 1 second since last save
-        if current_time - self.last_save_time > 1.0:
-            self.autosave()
-            self.last_save_time = current_time
-
-    def force_save(self):
-        """Force save if there are pending changes"""
-        if self.changes_pending:
-            self.autosave()
-            self.last_save_time = time.time()
-            self.changes_pending = False
+        self.main_window.autosave_scheduler.mark_dirty(self)
 
     def autosave(self):
-        """Perform autosave with integrity checks"""
-        content = self.editor.toPlainText()
-        
+        """Hand the edits since the last autosave to the writer thread
+
+        Usually that is a journal append. Now and then, or once the journal
+        grows too big, a full checkpoint is written instead. Returns roughly
+        how many characters were handed over.
+        """
         try:
-            # Create temporary files first
-            temp_content = self.session_path + '.tmp'
-            temp_meta = self.meta_path + '.tmp'
+            journal = self.edit_journal
+            document = self.editor.document()
+            if document.revision() == self.last_autosave_revision and not journal.needs_checkpoint:
+                self.changes_pending = False  # Nothing edited since the last autosave
+                return 0
+            self.last_autosave_revision = document.revision()
             
-            # Save content with integrity check
-            with open(temp_content, 'w', encoding='utf-8') as f:
-                f.write(content)
-                f.flush()
-                os.fsync(f.fileno())
-            
-            # Verify content was written correctly
-            with open(temp_content, 'r', encoding='utf-8') as f:
-                saved_content = f.read()
-                if saved_content != content:
-                    raise ValueError("Content verification failed")
-            
-            # Save metadata
-            metadata = {
-                'timestamp': time.time(),
-                'original_file': self.current_file,
-                'cursor_position': self.editor.textCursor().position(),
-                'scroll_position': self.editor.verticalScrollBar().value(),
-                'modified': self.editor.document().isModified(),
-                'tab_index': self.main_window.tab_widget.indexOf(self) if self.main_window else 0,
-                'active': self.main_window.tab_widget.currentWidget() == self if self.main_window else False,
-                'checksum': hashlib.md5(content.encode()).hexdigest()
-            }
-            
-            with open(temp_meta, 'w') as f:
-                json.dump(metadata, f)
-                f.flush()
-                os.fsync(f.fileno())
-            
-            # Atomically replace old files with new ones
-            os.replace(temp_content, self.session_path)
-            os.replace(temp_meta, self.meta_path)
-            
-            # Update session state
-            if self.main_window:
-                current_tabs = self.main_window.get_open_tab_ids()
-                self.settings_manager.save_session_state(current_tabs)
+            interval = self.settings_manager.get_setting('autosave_checkpoint_interval_s', 300)
+            if (journal.needs_checkpoint
+                    or journal.journal_chars > max(65536, document.characterCount() // 2)
+                    or time.time() - self.last_checkpoint_time > interval):
+                return self.write_checkpoint()
             
+            ops = journal.take_ops()
             self.changes_pending = False
+            if not ops:
+                return 0
+            self.main_window.autosave_scheduler.writer.append(self, self.recovery_id,
+                                                              journal.epoch, ops)
+            return sum(len(added) + 16 for _, _, added in ops)
                 
         except Exception as e:
             print(f"Autosave failed: {str(e)}")
-
-    def save_file(self, force_dialog=False):
-        """Save file, optionally forcing Save As dialog"""
+            return 0
+
+    def write_checkpoint(self):
+        """Hand a full snapshot of the document to the writer thread"""
+        # Only capturing the snapshot happens here; encoding, hashing and
+        # disk writes run on the writer thread
+        metadata = {
+            'timestamp': time.time(),
+            'original_file': self.current_file,
+            'cursor_position': self.editor.textCursor().position(),
+            'scroll_position': self.editor.verticalScrollBar().value(),
+            'modified': self.editor.document().isModified(),
+            'tab_index': self.main_window.tab_widget.indexOf(self) if self.main_window else 0,
+            'active': self.main_window.tab_widget.currentWidget() == self if self.main_window else False,
+            'journal_epoch': self.edit_journal.start_checkpoint(),
+            'encoding': self.encoding,
+            'document': self.history_key()
+        }
+        text = self.editor.toPlainText()
+        snapshot = AutosaveSnapshot(self.recovery_id, text, metadata,
+                                    self.settings_manager.get_setting('autosave_verify', False))
+        self.main_window.autosave_scheduler.writer.submit(self, snapshot)
+        self.last_checkpoint_time = time.time()
+        self.changes_pending = False
+        return len(text)
+
+    def history_key(self):
+        """Name this document's versions are kept under"""
+        return self.current_file or self.recovery_id
+
+    def autosave_finished(self, checksum):
+        """Called by the autosave writer once a snapshot is on disk"""
+        self.last_autosave_checksum = checksum
+
+    def autosave_failed(self, message):
+        """Called by the autosave writer when a snapshot could not be written"""
+        print(f"Autosave failed: {message}")
+        self.changes_pending = True  # Try again on the next round
+        self.edit_journal.needs_checkpoint = True  # Lost edits are only in a full save
+        self.last_autosave_revision = None
+        if self.main_window:
+            self.main_window.autosave_scheduler.mark_dirty(self)
+            self.main_window.statusBar.showMessage(f"Autosave failed: {message}", 5000)
+
+    def save_file(self, force_dialog=False, wait=False):
+        """Save file, optionally forcing Save As dialog
+
+        The text is written in the background and the document counts as
+        saved once the write is confirmed. With wait, returns only after
+        that, and whether it succeeded.
+        """
+        if self.loading:
+            return False  # Only part of the file is in the editor
         if not self.current_file or force_dialog:
             file_name, _ = QFileDialog.getSaveFileName(
                 self,
@@ -679,29 +1792,64 @@ class EditorTab(QWidget):
             else:
                 return False
                 
-        try:
-            with open(self.current_file, 'w', encoding='utf-8') as f:
-                f.write(self.editor.toPlainText())
-            
-            # Update tab title
-            if self.main_window:
-                current_index = self.main_window.tab_widget.indexOf(self)
-                self.main_window.tab_widget.setTabText(current_index, os.path.basename(self.current_file))
-            
-            # Mark document as unmodified
-            self.editor.document().setModified(False)
-            return True
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not save file: {str(e)}")
-            return False
+        text = self.editor.toPlainText()
+        if not can_encode(text, self.encoding):
+            reply = QMessageBox.question(
+                self,
+                "Encoding",
+                f"This document has characters {self.encoding} cannot store. "
+                "Save it as UTF-8 instead?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return False
+            self.encoding = 'utf-8'
+        
+        job = SaveJob(self.current_file, text, self.encoding, self.editor.document().revision())
+        saver = FileSaver.instance(self.settings_manager.get_setting('save_workers', 2))
+        self.save_error = None
+        saver.save(self, job)
+        if self.main_window:
+            self.main_window.statusBar.showMessage(f"Saving {os.path.basename(job.path)}...")
+        if wait:
+            saver.wait(job.path)
+            return self.save_error is None
+        return True
+
+    def save_progress(self, percent):
+        """Called by the file saver as a big document is written"""
+        if self.main_window and self.current_file:
+            self.main_window.statusBar.showMessage(
+                f"Saving {os.path.basename(self.current_file)}... {percent}%")
+
+    def save_finished(self, job, error):
+        """Called by the file saver once a save is on disk, or failed"""
+        if error:
+            self.save_error = error
+            QMessageBox.critical(self, "Error", f"Could not save file: {error}")
+            return
+        
+        # Edits made while the file was written are still unsaved
+        document = self.editor.document()
+        if job.path == self.current_file and document.revision() == job.revision:
+            document.setModified(False)
+        
+        # Update tab title
+        if self.main_window:
+            current_index = self.main_window.tab_widget.indexOf(self)
+            title = os.path.basename(job.path) + ('*' if document.isModified() else '')
+            self.main_window.tab_widget.setTabText(current_index, title)
+            self.main_window.statusBar.showMessage(f"Saved {os.path.basename(job.path)}", 3000)
 
     def open_file(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "Open File", "", 
                                                  "Text Files (*.txt);;All Files (*)")
         if file_name:
-            self.current_file = file_name
-            with open(file_name, 'r') as file:
-                self.editor.setPlainText(file.read())
+            try:
+                self.load_file(file_name)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Could not open file: {str(e)}")
+                return
             
             # Update tab title to show file name
             if self.main_window and hasattr(self.main_window, 'tab_widget'):
@@ -711,6 +1859,144 @@ class EditorTab(QWidget):
                     file_name = os.path.basename(file_name)
                     self.main_window.tab_widget.setTabText(current_index, file_name)
             
+    def load_file(self, file_name):
+        """Show a file's text in the editor
+
+        Small files are read at once. Bigger ones are read and decoded on a
+        background thread and put into the document over several
+        event-loop turns, with spell checking and completion held off
+        until the whole text is in.
+        """
+        self.stop_loading()
+        legacy_encodings = self.settings_manager.get_setting('legacy_encodings', ['cp1256', 'cp1252'])
+        encoding = detect_file_encoding(file_name, legacy_encodings)
+        threshold = self.settings_manager.get_setting('background_load_threshold', 1000000)
+        if os.path.getsize(file_name) <= threshold:
+            try:
+                with open(file_name, 'r', encoding=encoding) as file:
+                    text = file.read()
+            except UnicodeDecodeError:
+                # The sample was clean but later bytes are not; a small
+                # file can be judged whole
+                with open(file_name, 'rb') as file:
+                    encoding = detect_encoding(file.read(), legacy_encodings)
+                with open(file_name, 'r', encoding=encoding) as file:
+                    text = file.read()
+            self.editor.setPlainText(text)
+            self.current_file = file_name
+            self.encoding = encoding
+            return
+        
+        self.file_loader = FileLoader(file_name, encoding, self)
+        self.file_loader.chunkReady.connect(self.load_timer.start)
+        self.file_loader.loadFailed.connect(self._handle_load_failed)
+        self.current_file = file_name
+        self.encoding = encoding
+        self.loading = True
+        self.edit_journal.needs_checkpoint = True  # The loaded text is saved whole
+        self.highlighter.set_enabled(False)
+        self.hide_suggestions()
+        self.editor.setReadOnly(True)  # Edits would land in the middle of the text
+        self.editor.setUndoRedoEnabled(False)
+        self.editor.clear()
+        self.load_label.setText(f"Loading {os.path.basename(file_name)}...")
+        self.load_progress.setValue(0)
+        self.load_bar.setVisible(True)
+        self.file_loader.start()
+
+    def _insert_loaded_chunks(self):
+        """Append decoded text to the document for a few milliseconds"""
+        loader = self.file_loader
+        if loader is None:
+            self.load_timer.stop()
+            return
+        chunk = None
+        cursor = QTextCursor(self.editor.document())
+        cursor.movePosition(QTextCursor.End)
+        deadline = time.perf_counter() + 0.015
+        while time.perf_counter() < deadline:
+            chunk = loader.take_chunk()
+            if chunk is None:
+                break
+            text, bytes_read = chunk
+            # Qt lays a paragraph out again whenever text is added to it, so
+            # only whole lines go in; a long line waits until it is complete
+            cut = text.rfind('\n') + 1
+            if cut:
+                self._load_tail.append(text[:cut])
+                cursor.insertText(''.join(self._load_tail))
+                self._load_tail = [text[cut:]]
+            else:
+                self._load_tail.append(text)
+            if loader.total_bytes:
+                self.load_progress.setValue(bytes_read * 1000 // loader.total_bytes)
+        
+        if loader.finished_reading():
+            cursor.insertText(''.join(self._load_tail))
+            self._load_tail = []
+        # The file as loaded is nothing unsaved
+        self.editor.document().setModified(False)
+        
+        if loader.finished_reading():
+            self._finish_loading()
+        elif chunk is None:
+            self.load_timer.stop()  # Until the loader signals chunkReady again
+
+    def _finish_loading(self):
+        """Make the loaded document editable and check it"""
+        self.load_timer.stop()
+        self.file_loader.wait()
+        self.file_loader = None
+        self.loading = False
+        self.load_bar.setVisible(False)
+        self.editor.setUndoRedoEnabled(True)
+        self.editor.setReadOnly(False)
+        self.editor.moveCursor(QTextCursor.Start)
+        self.editor.document().setModified(False)
+        self.highlighter.set_enabled(True)
+        self.on_text_changed()
+        self.status_timer.start()
+
+    def stop_loading(self):
+        """Abandon a background load, if any, and leave an empty document"""
+        if self.file_loader is None:
+            return
+        self.load_timer.stop()
+        self.file_loader.cancel()
+        self.file_loader.wait()
+        self.file_loader = None
+        self._load_tail = []
+        self.current_file = None
+        self.encoding = 'utf-8'
+        self.loading = False
+        self.editor.clear()
+        self.load_bar.setVisible(False)
+        self.editor.setUndoRedoEnabled(True)
+        self.editor.setReadOnly(False)
+        self.editor.document().setModified(False)
+        self.highlighter.set_enabled(True)
+
+    def discard_background_work(self):
+        """Drop work still queued for this tab, before it is closed"""
+        self.highlighter.spell_service.discard(self.highlighter)
+        self.completion_timer.stop()
+        CompletionWorker.instance().discard(self)
+
+    def cancel_loading(self):
+        """Stop a file that is still loading, at the user's request"""
+        if self.file_loader is not None:
+            self.stop_loading()
+            self.loadStopped.emit()
+
+    def _handle_load_failed(self, message):
+        """Report a file that could not be read to the end"""
+        if self.file_loader is None:
+            return
+        path = self.file_loader.path
+        self.stop_loading()
+        QMessageBox.critical(self, "Error", f"Could not open file {path}: {message}")
+        self.loadStopped.emit()
+
     def update_snippet_list(self):
         """Update snippet list and completer"""
         if hasattr(self, 'snippet_list'):
@@ -723,6 +2009,7 @@ class EditorTab(QWidget):
         text = self.snippet_manager.get_snippet(item.text())
         if text:
             self.editor.insertPlainText(text)
+            self.snippet_manager.record_use(item.text())
             
     def show_context_menu(self, pos):
         """Show context menu"""
@@ -736,12 +2023,13 @@ class EditorTab(QWidget):
             cursor.select(cursor.WordUnderCursor)
             self.editor.setTextCursor(cursor)
         
-        # Create menu with a slight delay to prevent accidental triggers
-        QTimer.singleShot(100, lambda: self._show_context_menu_impl(pos))
+        # Suggestions come from the cache, so the menu can open right away
+        self._show_context_menu_impl(pos)
 
     def _show_context_menu_impl(self, pos):
         """Implementation of context menu display"""
         menu = QMenu(self)
+        pending_suggestions = None
         
         # # Cut/Copy/Paste actions
         # menu.addAction("Cut", self.editor.cut)
@@ -820,17 +2108,25 @@ class EditorTab(QWidget):
             if not ' ' in selected_text:
                 # Add spell check suggestions if word is misspelled
                 if self.highlighter.spell_check_enabled:
-                    suggestions = self.highlighter.suggest(selected_text)[:7]  # Limit to 7 suggestions
-                    if suggestions:
+                    language = self.highlighter.block_language(self.editor.textCursor().block())
+                    suggestions = self.highlighter.cached_suggestions(selected_text, language)
+                    if suggestions is None:
+                        # Still computing; fill in the menu when the worker is done
+                        menu.addAction("Spelling Suggestions:").setEnabled(False)
+                        placeholder = menu.addAction("Computing suggestions\u2026")
+                        placeholder.setEnabled(False)
+                        menu.addSeparator()
+                        pending_suggestions = lambda word, computed: self._fill_menu_suggestions(
+                            menu, placeholder, selected_text, language, word, computed)
+                        self.spell_checker.suggestion_worker.suggestionsReady.connect(
+                            pending_suggestions)
+                    elif suggestions:
                         menu.addAction("Spelling Suggestions:").setEnabled(False)
-                        for suggestion in suggestions:
-                            action = menu.addAction(suggestion)
-                            action.triggered.connect(lambda checked, word=suggestion: 
-                                self.replace_word(word))
+                        self._add_suggestion_actions(menu, suggestions)
                         menu.addSeparator()
                 
                 # Add to dictionary option if not already in it
-                if selected_text not in self.settings_manager.get_setting('user_dictionary', []):
+                if selected_text not in self.settings_manager.user_dictionary:
                     add_action = menu.addAction("Add to Dictionary")
                     add_action.triggered.connect(lambda: self.add_to_dictionary(selected_text))
                     menu.addSeparator()
@@ -845,6 +2141,31 @@ class EditorTab(QWidget):
         
         # Show menu
         menu.exec_(self.editor.mapToGlobal(pos))
+        if pending_suggestions:
+            self.spell_checker.suggestion_worker.suggestionsReady.disconnect(pending_suggestions)
+
+    def _add_suggestion_actions(self, menu, suggestions, before=None):
+        """Add up to 7 replacement actions to menu"""
+        for suggestion in suggestions[:7]:
+            action = QAction(suggestion, menu)
+            action.triggered.connect(lambda checked, word=suggestion: 
+                self.replace_word(word))
+            menu.insertAction(before, action)
+
+    def _fill_menu_suggestions(self, menu, placeholder, selected_text, language, word, computed):
+        """Replace the placeholder of an open menu once suggestions arrive"""
+        if word != selected_text:
+            return
+        suggestions = self.highlighter.cached_suggestions(selected_text, language)
+        if suggestions is None:
+            # Not cached because the dictionary changed while they were
+            # computed; the backend's suggestions still apply
+            suggestions = self.highlighter.merge_suggestions(selected_text, computed)
+        if suggestions:
+            self._add_suggestion_actions(menu, suggestions, before=placeholder)
+            menu.removeAction(placeholder)
+        else:
+            placeholder.setText("No suggestions")
 
     def search_in_browser(self, url):
         """Search the given URL in the browser pane"""
@@ -878,20 +2199,10 @@ class EditorTab(QWidget):
 
     def add_to_dictionary(self, word):
         """Add word to user dictionary"""
-        if self.USE_ENCHANT:
-            # Enchant spell checker implementation
-            self.spell_checker.add(word)
-        else:
-            # PySpellChecker implementation
-            self.spell_checker.word_frequency.add(word)
-            # Force a recheck of the document
-            self.highlighter.rehighlight()
+        self.settings_manager.user_dictionary.add(word)
         
-        # Add to user dictionary in settings
-        user_dict = self.settings_manager.get_setting('user_dictionary', [])
-        if word not in user_dict:
-            user_dict.append(word)
-            self.settings_manager.save_setting('user_dictionary', user_dict)
+        # Every open tab is rehighlighted through the shared service
+        self.spell_checker.add(word)
 
     def ensure_browser_visible(self):
         """Ensure browser pane is visible"""
@@ -1036,6 +2347,7 @@ class EditorTab(QWidget):
         snippet_content = self.snippet_manager.get_snippet(completion)
         if snippet_content:
             cursor.insertText(snippet_content)
+            self.snippet_manager.record_use(completion)
     
     def navigate_to_url(self):
         """Navigate to URL entered in URL bar"""
@@ -1287,17 +2599,18 @@ class EditorTab(QWidget):
 
     def update_status(self):
         """Update word and character count"""
-        if not hasattr(self, 'main_window') or not self.main_window:
+        if not hasattr(self, 'main_window') or not self.main_window or self.loading:
             return
         
         text = self.editor.toPlainText()
         
-        # Update word count (split by whitespace and filter empty strings)
-        words = len([word for word in text.split() if word.strip()])
+        # Update word count (split() never yields empty strings)
+        words = len(text.split())
         chars = len(text)
         
         # Update status bar
-        self.main_window.statusBar.showMessage(f"Words: {words} | Characters: {chars}")
+        self.main_window.statusBar.showMessage(
+            f"Words: {words} | Characters: {chars} | {self.encoding.upper()}")
 
     def toggle_focus_mode(self):
         """Toggle focus mode"""
@@ -1412,18 +2725,39 @@ class EditorTab(QWidget):
                 self.height() - self.exit_focus_btn.height() - margin
             )
 
+    def update_visible_blocks(self):
+        """Tell the highlighter which blocks are on screen"""
+        # cursorForPosition() is unreliable while large documents are still
+        # being laid out lazily, so search block positions directly
+        top = self.editor.verticalScrollBar().value()
+        bottom = top + self.editor.viewport().height()
+        self.highlighter.set_visible_blocks(self.block_number_at(top),
+                                            self.block_number_at(bottom))
+
+    def block_number_at(self, y):
+        """Return the number of the block at document coordinate y"""
+        document = self.editor.document()
+        layout = document.documentLayout()
+        low, high = 0, document.blockCount() - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if layout.blockBoundingRect(document.findBlockByNumber(middle)).top() <= y:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
     def resizeEvent(self, event):
         """Handle resize events to keep exit button positioned correctly"""
         super().resizeEvent(event)
+        self.update_visible_blocks()
         if hasattr(self, 'focus_mode') and self.focus_mode:
             self.update_exit_button_position()
 
     def handle_escape(self):
         """Handle ESC key press"""
-        if self.suggestion_tooltip:
-            self.suggestion_tooltip.hide()
-            self.suggestion_tooltip.deleteLater()
-            self.suggestion_tooltip = None
+        if self.suggestions_visible():
+            self.hide_suggestions()
             return
             
         if self.focus_mode:
@@ -1580,13 +2914,25 @@ class EditorTab(QWidget):
         menu.exec_(self.editor.mapToGlobal(position))
 
     def handle_text_changed(self):
-        """Handle text changes for autocompletion"""
-        if self.suggestion_tooltip:
-            self.suggestion_tooltip.hide()
-            self.suggestion_tooltip.deleteLater()
-            self.suggestion_tooltip = None
-            
-        cursor = self.editor.textCursor()
+        """Schedule autocompletion for when typing pauses"""
+        self.completion_timer.start()
+
+    def add_completion_provider(self, provider):
+        """Add a CompletionProvider; threaded ones run off the GUI thread"""
+        self.completion_providers.append(provider)
+
+    def corpus_word_indexes(self):
+        """Word indexes of every open document, for corpus completion"""
+        if self.main_window and hasattr(self.main_window, 'word_indexes'):
+            return self.main_window.word_indexes()
+        return [self.word_index]
+
+    def completion_tag(self):
+        """Identify the text and cursor a completion request was made for"""
+        return (self.editor.document().revision(), self.editor.textCursor().position())
+
+    def completion_word(self, cursor):
+        """Return the word being typed before cursor"""
         current_line = cursor.block().text()
         current_position = cursor.positionInBlock()
         
@@ -1596,25 +2942,49 @@ class EditorTab(QWidget):
                                  current_line[word_start - 1] in '_-'):
             word_start -= 1
         
-        current_word = current_line[word_start:current_position]
+        return current_line[word_start:current_position]
+
+    def flush_completions(self):
+        """Run a pending completion request now, e.g. before a popup key is handled"""
+        if self.completion_timer.isActive():
+            self.completion_timer.stop()
+            self.update_completions()
+
+    def update_completions(self):
+        """Show completions for the word being typed"""
+        if self.loading:
+            return
+        cursor = self.editor.textCursor()
+        current_word = self.completion_word(cursor)
+        suggestions = []
+        threaded = []
         
         if len(current_word) >= 2:  # Only show suggestions after 2 characters
-            suggestions = []
-            
-            # Get snippet suggestions
-            if hasattr(self, 'snippet_manager'):
-                for title in self.snippet_manager.get_snippets():
-                    if title.lower().startswith(current_word.lower()):
-                        suggestions.append(('snippet', title))
-
-            # Get dictionary suggestions
-            user_dict = self.settings_manager.get_setting('user_dictionary', [])
-            for word in user_dict:
-                if word.lower().startswith(current_word.lower()) and word.lower() != current_word.lower():
-                    suggestions.append(('word', word))
-            
-            if suggestions:
-                self.show_suggestion_tooltip(suggestions, cursor)
+            suggestions = collect_completions(
+                [p for p in self.completion_providers if not p.threaded],
+                current_word, self.completion_limit)
+            threaded = [p for p in self.completion_providers if p.threaded]
+        
+        if suggestions:
+            self.show_suggestion_tooltip(suggestions, cursor)
+        elif self.suggestions_visible():
+            self.hide_suggestions()
+        
+        # Slower providers report back through apply_completions
+        if threaded and len(suggestions) < self.completion_limit:
+            CompletionWorker.instance().submit(self, self.completion_tag(), current_word,
+                                               threaded, self.completion_limit)
+
+    def apply_completions(self, tag, word, suggestions):
+        """Merge results of threaded providers unless the text moved on"""
+        if tag != self.completion_tag():
+            return  # Stale: typed or moved since the request
+        merged = self.current_suggestions if self.suggestions_visible() else []
+        seen = {text for _, text in merged}
+        merged = merged + [item for item in suggestions if item[1] not in seen]
+        if merged:
+            self.show_suggestion_tooltip(merged[:self.completion_limit],
+                                         self.editor.textCursor())
 
     def save_pane_states(self):
         """Save pane visibility and sizes"""
@@ -1649,73 +3019,38 @@ class EditorTab(QWidget):
         super().keyPressEvent(event)  # Just pass through to parent
 
     def show_suggestion_tooltip(self, suggestions, cursor):
-        """Show suggestions in a tooltip-like widget"""
-        self.hide_suggestions()
-        self.current_suggestions = suggestions
+        """Show suggestions in the popup below the cursor"""
+        self.current_suggestions = suggestions[:7]
         self.selected_suggestion_index = -1
         
-        # Create tooltip widget
-        self.suggestion_tooltip = QWidget(self.editor, Qt.ToolTip)
-        layout = QVBoxLayout(self.suggestion_tooltip)
-        layout.setContentsMargins(4, 4, 4, 4)
-        layout.setSpacing(2)
-        
-        # Style the tooltip
-        self.suggestion_tooltip.setStyleSheet("""
-            QWidget {
-                background-color: palette(window);
-                border: 1px solid palette(mid);
-                border-radius: 3px;
-            }
-            QLabel {
-                padding: 2px 8px;
-                color: palette(text);
-                border-radius: 2px;
-                margin: 1px;
-                font-family: "Courier New", "DejaVu Sans Mono", monospace;
-            }
-        """)
-        
-        # Add suggestions (limited to 7)
-        for i, (suggestion_type, text) in enumerate(suggestions[:7]):
-            container = QWidget()
-            container_layout = QVBoxLayout(container)
-            container_layout.setContentsMargins(0, 0, 0, 0)
-            container_layout.setSpacing(1)
-            
+        rows = []
+        for suggestion_type, text in self.current_suggestions:
             if suggestion_type == 'snippet':
                 # For snippets, show content directly
-                content = self.snippet_manager.get_snippet(text)
-                if content:
-                    # Limit preview to first line or 50 chars
-                    preview = content.split('\n')[0][:50]
-                    if len(preview) < len(content):
-                        preview += "..."
-                    label = QLabel(preview)
+                content = self.snippet_manager.get_snippet(text) or text
+                # Limit preview to first line or 50 chars
+                preview = content.split('\n')[0][:50]
+                if len(preview) < len(content):
+                    preview += "..."
+                rows.append(preview)
             else:
                 # For words, just show the word
-                label = QLabel(text)
-            
-            container_layout.addWidget(label)
-            
-            # Make container clickable
-            container.mousePressEvent = lambda _, t=text: self.apply_suggestion(t)
-            container.setCursor(Qt.PointingHandCursor)
-            
-            layout.addWidget(container)
+                rows.append(text)
+        self.suggestion_popup.set_rows(rows)
         
-        # Position tooltip below the cursor
+        # Position popup below the cursor
         rect = self.editor.cursorRect(cursor)
         pos = self.editor.mapToGlobal(rect.bottomLeft())
         pos.setY(pos.y() + 5)  # Add a small offset
-        self.suggestion_tooltip.move(pos)
+        self.suggestion_popup.move(pos)
         
-        # Calculate and set fixed size
-        self.suggestion_tooltip.adjustSize()
-        
-        # Show tooltip
-        self.suggestion_tooltip.show()
-        self.suggestion_tooltip.raise_()
+        if not self.suggestion_popup.isVisible():
+            self.suggestion_popup.show()
+            self.suggestion_popup.raise_()
+
+    def suggestions_visible(self):
+        """Whether the completion popup is showing suggestions"""
+        return bool(self.current_suggestions) and self.suggestion_popup.isVisible()
 
     def select_next_suggestion(self):
         """Select next suggestion in the list"""
@@ -1735,33 +3070,17 @@ class EditorTab(QWidget):
 
     def update_suggestion_highlighting(self):
         """Update the visual highlighting of selected suggestion"""
-        if not self.suggestion_tooltip:
-            return
-            
-        layout = self.suggestion_tooltip.layout()
-        for i in range(layout.count()):
-            container = layout.itemAt(i).widget()
-            if i == self.selected_suggestion_index:
-                container.setStyleSheet("""
-                    background-color: palette(highlight);
-                    border-radius: 2px;
-                    QLabel { color: palette(highlighted-text); }
-                """)
-            else:
-                container.setStyleSheet("")
+        self.suggestion_popup.select_row(self.selected_suggestion_index)
 
     def hide_suggestions(self):
-        """Hide suggestion tooltip"""
-        if self.suggestion_tooltip:
-            self.suggestion_tooltip.hide()
-            self.suggestion_tooltip.deleteLater()
-            self.suggestion_tooltip = None
+        """Hide suggestion popup"""
+        self.suggestion_popup.hide()
         self.selected_suggestion_index = -1
         self.current_suggestions = []
 
     def apply_suggestion(self, suggestion):
         """Apply the clicked suggestion"""
-        if not self.suggestion_tooltip:
+        if not self.suggestions_visible():
             return
             
         cursor = self.editor.textCursor()
@@ -1791,12 +3110,14 @@ class EditorTab(QWidget):
             content = self.snippet_manager.get_snippet(suggestion)
             if content:
                 cursor.insertText(content)
+                self.snippet_manager.record_use(suggestion)
         else:
             # Insert the word suggestion directly
             cursor.insertText(suggestion)
         
         # Hide tooltip
         self.hide_suggestions()
+        self.completion_timer.stop()  # Nothing to complete after accepting one
         
         # Set focus back to editor
         self.editor.setFocus()
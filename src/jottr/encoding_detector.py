@@ -0,0 +1,104 @@
+import codecs
+import re
+from collections import Counter
+from word_tokenizer import WORD_PATTERN, SCRIPT_TABLE, SCRIPT_COMMON
+
+SAMPLE_BYTES = 65536  # Prefix of a file looked at to pick its encoding
+
+# Longest first: the UTF-32 LE mark starts with the UTF-16 LE one
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+CONTROL_PATTERN = re.compile('[\x00-\x08\x0b\x0e-\x1f\x7f-\x9f]')
+
+def _utf16_without_bom(data):
+    """'utf-16-le' or 'utf-16-be' if data looks like UTF-16 text without a mark, else None
+
+    Text in one alphabet keeps the high bytes of its characters to one or
+    two values, one of them zero for spaces and punctuation.
+    """
+    half = len(data) // 2
+    if half < 8:
+        return None
+    for encoding, high, low in (('utf-16-le', data[1::2], data[0::2]),
+                                ('utf-16-be', data[0::2], data[1::2])):
+        common = Counter(high).most_common(2)
+        if (high.count(0) > half * 0.05 and low.count(0) < half * 0.05
+                and sum(count for _, count in common) > half * 0.9):
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(data, False)
+            except UnicodeDecodeError:
+                continue
+            return encoding
+    return None
+
+def _legacy_score(text):
+    """How much text looks like real writing rather than bytes read with the wrong table"""
+    score = 0
+    for word in WORD_PATTERN.findall(text):
+        if word.isascii():
+            continue
+        scripts = {SCRIPT_TABLE[ord(char)] for char in word} - {SCRIPT_COMMON}
+        if len(scripts) > 1:
+            score -= len(word)  # One word in two scripts
+            continue
+        score += sum(1 for char in word if ord(char) > 127)
+        # Lowercase followed by uppercase inside a word is rare in real text
+        score -= 2 * sum(1 for a, b in zip(word, word[1:]) if a.islower() and b.isupper())
+    return score - 4 * len(CONTROL_PATTERN.findall(text))
+
+def detect_encoding(data, legacy_encodings=('cp1256', 'cp1252'), final=True):
+    """Pick the encoding of text starting with data
+
+    A byte order mark decides; otherwise UTF-16 is recognised by its zero
+    bytes and UTF-8 by decoding cleanly. Anything else gets the legacy
+    encoding whose decoding looks most like real text, earlier ones
+    winning ties. Pass final=False when data is only a prefix, so a
+    character cut off at its end does not count against UTF-8.
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding
+
+    utf16 = _utf16_without_bom(data)
+    if utf16:
+        return utf16
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(data, final)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    best, best_score = None, None
+    for encoding in legacy_encodings:
+        try:
+            text = data.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        score = _legacy_score(text)
+        if best_score is None or score > best_score:
+            best, best_score = encoding, score
+    return best or 'latin-1'  # Decodes anything
+
+def detect_file_encoding(path, legacy_encodings=('cp1256', 'cp1252')):
+    """Pick the encoding of a file from a bounded prefix of it"""
+    with open(path, 'rb') as f:
+        data = f.read(SAMPLE_BYTES)
+        final = len(data) < SAMPLE_BYTES
+    return detect_encoding(data, legacy_encodings, final)
+
+def can_encode(text, encoding):
+    """Whether every character of text can be written in encoding"""
+    if codecs.lookup(encoding).name.startswith(('utf-8', 'utf-16', 'utf-32')):
+        return True
+    try:
+        text.encode(encoding)
+        return True
+    except UnicodeEncodeError:
+        return False
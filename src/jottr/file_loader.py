@@ -0,0 +1,74 @@
+import os
+import threading
+from collections import deque
+from PyQt5.QtCore import QThread, pyqtSignal
+
+class FileLoader(QThread):
+    """Reads and decodes one file off the GUI thread, a chunk at a time
+
+    Decoded chunks wait in a short queue for the GUI thread to take them
+    with take_chunk(); reading pauses while the queue is full, so a slow
+    document never holds more than a few chunks of text in memory.
+    """
+    chunkReady = pyqtSignal()
+    # error message
+    loadFailed = pyqtSignal(str)
+
+    chunk_chars = 16384
+    max_queued = 32
+
+    def __init__(self, path, encoding='utf-8', parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.encoding = encoding
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self.done = False  # Every chunk has been queued
+        self._chunks = deque()  # (text, bytes read once it is in)
+        self._condition = threading.Condition()
+        self._cancelled = False
+
+    def take_chunk(self):
+        """Return the next (text, bytes read) decoded, or None if none is ready"""
+        with self._condition:
+            if not self._chunks:
+                return None
+            chunk = self._chunks.popleft()
+            self._condition.notify_all()
+            return chunk
+
+    def finished_reading(self):
+        """Whether every chunk has been queued and taken"""
+        with self._condition:
+            return self.done and not self._chunks
+
+    def cancel(self):
+        """Stop reading and drop whatever is queued"""
+        with self._condition:
+            self._cancelled = True
+            self._chunks.clear()
+            self._condition.notify_all()
+
+    def run(self):
+        try:
+            # The text layer decodes incrementally and translates newlines,
+            # also when a multi-byte character or \r\n spans two chunks
+            with open(self.path, 'r', encoding=self.encoding) as f:
+                while True:
+                    text = f.read(self.chunk_chars)
+                    with self._condition:
+                        while len(self._chunks) >= self.max_queued and not self._cancelled:
+                            self._condition.wait()
+                        if self._cancelled:
+                            return
+                        if not text:
+                            self.done = True
+                        else:
+                            self.bytes_read = min(f.buffer.tell(), self.total_bytes)
+                            self._chunks.append((text, self.bytes_read))
+                    self.chunkReady.emit()
+                    if not text:
+                        return
+        except Exception as e:
+            if not self._cancelled:
+                self.loadFailed.emit(str(e))
@@ -0,0 +1,144 @@
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+# A document captured on the GUI thread for saving. revision is the
+# document revision the text was taken at.
+SaveJob = namedtuple('SaveJob', 'path text encoding revision')
+
+WRITE_CHARS = 1 << 20  # Characters written between progress reports
+
+# Read once on the GUI thread; os.umask() can only be read by changing it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def write_atomically(path, text, encoding, progress=None):
+    """Replace the file at path with text, never leaving it half written
+
+    The text goes to a temporary file in the same directory, which is
+    synced and then renamed over the target. progress, if given, is
+    called with the percentage written so far.
+    """
+    path = os.path.realpath(path)  # Replace a link's target, not the link
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp',
+                                     dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            for start in range(0, len(text), WRITE_CHARS):
+                f.write(text[start:start + WRITE_CHARS])
+                if progress:
+                    progress(min(100, (start + WRITE_CHARS) * 100 // len(text)))
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK  # What a plain open() would have given a new file
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable
+    if hasattr(os, 'O_DIRECTORY'):
+        directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+class FileSaver(QObject):
+    """Saves files for every tab on a small shared pool of I/O threads
+
+    Saves of different files run side by side, up to the pool size. A
+    save of a file that is still being written waits for that write, and
+    only the newest one waits.
+    """
+    # editor tab, percentage written
+    saveProgress = pyqtSignal(object, int)
+    # editor tab, job, error message or '' on success
+    saveFinished = pyqtSignal(object, object, str)
+    _instance = None
+
+    @classmethod
+    def instance(cls, max_workers=2):
+        """Return the shared saver, creating it on first use"""
+        if cls._instance is None:
+            cls._instance = cls(max_workers)
+            app = QApplication.instance()
+            if app:
+                app.aboutToQuit.connect(cls._instance.stop)
+        return cls._instance
+
+    def __init__(self, max_workers):
+        super().__init__()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._running = {}  # path -> (future, job) being written
+        self._waiting = {}  # path -> (owner, job) to write once the running one is done
+        self.saveProgress.connect(self._deliver_progress)
+        self.saveFinished.connect(self._handle_finished)
+
+    def save(self, owner, job):
+        """Write job in the background; owner.save_finished is called on the GUI thread"""
+        if job.path in self._running:
+            self._waiting[job.path] = (owner, job)
+        else:
+            self._start(owner, job)
+
+    def _start(self, owner, job):
+        self._running[job.path] = (self._executor.submit(self._write, owner, job), job)
+
+    def _write(self, owner, job):
+        """Runs on a pool thread"""
+        try:
+            write_atomically(job.path, job.text, job.encoding,
+                             lambda percent: self.saveProgress.emit(owner, percent))
+            error = ''
+        except Exception as e:
+            error = str(e)
+        self.saveFinished.emit(owner, job, error)
+        return owner, job, error
+
+    @staticmethod
+    def _deliver_progress(owner, percent):
+        try:
+            owner.save_progress(percent)
+        except RuntimeError:
+            pass  # Editor was closed while its file was written
+
+    def _handle_finished(self, owner, job, error):
+        """Start the save waiting for this file, then tell the editor"""
+        running = self._running.get(job.path)
+        if running is None or running[1] is not job:
+            return  # Already handled by wait()
+        del self._running[job.path]
+        if job.path in self._waiting:
+            self._start(*self._waiting.pop(job.path))
+        try:
+            owner.save_finished(job, error)
+        except RuntimeError:
+            pass
+
+    def wait(self, path=None):
+        """Block until the saves of path, or of every file, are written and reported"""
+        while True:
+            paths = [path] if path is not None else list(self._running)
+            paths = [p for p in paths if p in self._running]
+            if not paths:
+                return
+            future, _ = self._running[paths[0]]
+            self._handle_finished(*future.result())
+
+    def stop(self):
+        """Finish every save, then the pool"""
+        self.wait()
+        self._executor.shutdown(wait=True)
+        FileSaver._instance = None
@@ -0,0 +1,500 @@
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QAbstractScrollArea, QLineEdit,
+                             QPushButton, QLabel, QMenu, QApplication, QMessageBox)
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QFontMetrics, QKeySequence
+
+INDEX_STEP = 65536  # Bytes between line index entries
+SCAN_BYTES = 1 << 20  # Largest piece of the file copied out at a time
+SEARCH_BYTES = 16 << 20  # Bytes searched per event-loop turn
+MAX_LINE_BYTES = 4096  # Bytes of a long line that are shown
+
+def count_newlines(buffer, start, end):
+    """Count line breaks in buffer[start:end], copying out a bounded piece at a time"""
+    count = 0
+    while start < end:
+        stop = min(start + SCAN_BYTES, end)
+        count += buffer[start:stop].count(b'\n')
+        start = stop
+    return count
+
+def decode_line(data):
+    """Text of a line's bytes as shown"""
+    return data.decode('utf-8', errors='replace').rstrip('\r').replace('\t', '    ')
+
+class LineIndex:
+    """Sparse map from line numbers to byte offsets in a mapped file
+
+    Only the first line starting after every INDEX_STEP bytes is recorded,
+    so a multi-GB file takes a few MB at most; lines in between are found
+    by scanning forward from the nearest entry. Entries are added by a
+    LineIndexer thread while the GUI thread reads them.
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.offsets = array('q', [0])  # Byte offset of each entry's line
+        self.lines = array('q', [0])  # Line number of each entry
+        self.total_lines = None  # Known once indexing is complete
+        self._lock = threading.Lock()
+
+    def add(self, offset, line):
+        with self._lock:
+            self.offsets.append(offset)
+            self.lines.append(line)
+
+    def line_count(self):
+        """Number of lines, or of lines indexed so far"""
+        with self._lock:
+            if self.total_lines is not None:
+                return self.total_lines
+            return self.lines[-1] + 1
+
+    def _entry_for_line(self, line):
+        with self._lock:
+            i = bisect_right(self.lines, line) - 1
+            return self.offsets[i], self.lines[i]
+
+    def line_offset(self, line):
+        """Byte offset where line starts, or None past the end"""
+        offset, entry_line = self._entry_for_line(line)
+        for _ in range(line - entry_line):
+            end = self.buffer.find(b'\n', offset)
+            if end == -1:
+                return None
+            offset = end + 1
+        return offset
+
+    def line_end(self, offset):
+        """Byte offset of the line break ending the line at offset, or the file size"""
+        end = self.buffer.find(b'\n', offset)
+        return self.size if end == -1 else end
+
+    def line_at(self, offset):
+        """Line number containing offset, or None if not indexed that far yet"""
+        with self._lock:
+            i = bisect_right(self.offsets, offset) - 1
+            entry_offset, entry_line = self.offsets[i], self.lines[i]
+            complete = self.total_lines is not None
+            last = i == len(self.offsets) - 1
+        if last and not complete:
+            return None
+        return entry_line + count_newlines(self.buffer, entry_offset, offset)
+
+class LineIndexer(QThread):
+    """Builds a LineIndex in the background"""
+    # lines indexed so far
+    progress = pyqtSignal(int)
+    indexFinished = pyqtSignal(int)
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self._stopping = False
+
+    def stop(self):
+        """Finish the thread and wait for it"""
+        self._stopping = True
+        self.wait()
+
+    def run(self):
+        index = self.index
+        buffer = index.buffer
+        offset = 0
+        line = 0
+        entries = 0
+        while not self._stopping:
+            end = buffer.find(b'\n', offset + INDEX_STEP) if offset + INDEX_STEP < index.size else -1
+            if end == -1:
+                break
+            line += count_newlines(buffer, offset, end + 1)
+            offset = end + 1
+            index.add(offset, line)
+            entries += 1
+            if entries % 256 == 0:
+                self.progress.emit(line)
+        if self._stopping:
+            return
+        index.total_lines = line + count_newlines(buffer, offset, index.size) + 1
+        self.indexFinished.emit(index.total_lines)
+
+class FileViewerWidget(QAbstractScrollArea):
+    """Draws the lines of a LineIndex that are in view, and selects whole lines"""
+    def __init__(self, index, font, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.setFont(font)
+        self.anchor_line = 0
+        self.cursor_line = 0
+        self.match = None  # (line, start offset, end offset) of the current search match
+        self.margin = 4
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.update_scroll_range()
+
+    def line_height(self):
+        return QFontMetrics(self.font()).lineSpacing()
+
+    def visible_line_count(self):
+        return max(1, self.viewport().height() // self.line_height())
+
+    def update_scroll_range(self):
+        """Fit the scroll bars to the lines indexed so far"""
+        visible = self.visible_line_count()
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setRange(0, max(0, self.index.line_count() - visible))
+        scrollbar.setPageStep(visible)
+        scrollbar.setSingleStep(1)
+        self.horizontalScrollBar().setSingleStep(QFontMetrics(self.font()).averageCharWidth())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_range()
+
+    def visible_lines(self):
+        """[(line number, start offset, end offset)] of the lines in view"""
+        first = self.verticalScrollBar().value()
+        offset = self.index.line_offset(first)
+        lines = []
+        if offset is None:
+            return lines
+        for line in range(first, first + self.visible_line_count() + 1):
+            end = self.index.line_end(offset)
+            lines.append((line, offset, end))
+            if end >= self.index.size:
+                break
+            offset = end + 1
+        return lines
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        metrics = QFontMetrics(self.font())
+        height = metrics.lineSpacing()
+        x = self.margin - self.horizontalScrollBar().value()
+        first, last = sorted((self.anchor_line, self.cursor_line))
+        widest = 0
+        painter.fillRect(self.viewport().rect(), palette.base())
+        for row, (line, start, end) in enumerate(self.visible_lines()):
+            y = row * height
+            text = decode_line(self.index.buffer[start:min(end, start + MAX_LINE_BYTES)])
+            if end - start > MAX_LINE_BYTES:
+                text += " …"
+            widest = max(widest, metrics.horizontalAdvance(text))
+            if first <= line <= last:
+                painter.fillRect(0, y, self.viewport().width(), height, palette.highlight())
+                painter.setPen(palette.highlightedText().color())
+            else:
+                painter.setPen(palette.text().color())
+            if self.match and self.match[0] == line:
+                _, match_start, match_end = self.match
+                before = decode_line(self.index.buffer[start:match_start])
+                found = decode_line(self.index.buffer[match_start:match_end])
+                painter.fillRect(x + metrics.horizontalAdvance(before), y,
+                                 metrics.horizontalAdvance(found), height, Qt.yellow)
+            painter.drawText(x, y + metrics.ascent(), text)
+        painter.end()
+
+        # Lines come and go while scrolling, so the width follows what is shown
+        scrollbar = self.horizontalScrollBar()
+        maximum = max(0, widest + 2 * self.margin - self.viewport().width())
+        if maximum > scrollbar.maximum():
+            scrollbar.setRange(0, maximum)
+        scrollbar.setPageStep(self.viewport().width())
+
+    def line_at_y(self, y):
+        return self.verticalScrollBar().value() + max(0, y) // self.line_height()
+
+    def set_cursor_line(self, line, extend=False):
+        """Move the line cursor, extending the selection or starting a new one"""
+        line = max(0, min(line, self.index.line_count() - 1))
+        self.cursor_line = line
+        if not extend:
+            self.anchor_line = line
+        self.ensure_visible(line)
+        self.viewport().update()
+
+    def ensure_visible(self, line, center=False):
+        scrollbar = self.verticalScrollBar()
+        visible = self.visible_line_count()
+        if center:
+            scrollbar.setValue(line - visible // 2)
+        elif line < scrollbar.value():
+            scrollbar.setValue(line)
+        elif line >= scrollbar.value() + visible:
+            scrollbar.setValue(line - visible + 1)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.set_cursor_line(self.line_at_y(event.pos().y()),
+                                 bool(event.modifiers() & Qt.ShiftModifier))
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self.set_cursor_line(self.line_at_y(event.pos().y()), extend=True)
+
+    def keyPressEvent(self, event):
+        extend = bool(event.modifiers() & Qt.ShiftModifier)
+        moves = {
+            Qt.Key_Up: -1,
+            Qt.Key_Down: 1,
+            Qt.Key_PageUp: -self.visible_line_count(),
+            Qt.Key_PageDown: self.visible_line_count(),
+        }
+        if event.key() in moves:
+            self.set_cursor_line(self.cursor_line + moves[event.key()], extend)
+        elif event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            self.set_cursor_line(0, extend)
+        elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            self.set_cursor_line(self.index.line_count() - 1, extend)
+        else:
+            super().keyPressEvent(event)
+
+    def selected_range(self):
+        """Byte offsets spanning the selected lines, line breaks included"""
+        first, last = sorted((self.anchor_line, self.cursor_line))
+        start = self.index.line_offset(first)
+        end = self.index.line_offset(last)
+        if start is None or end is None:
+            return 0, 0
+        return start, min(self.index.line_end(end) + 1, self.index.size)
+
+class FileViewerTab(QWidget):
+    """Read-only view of a file too big to edit, memory-mapped rather than loaded
+
+    Only the lines in view are decoded, so memory use does not grow with
+    the file. Selected lines can be copied or opened in an editor tab.
+    """
+    # text, title
+    openInEditor = pyqtSignal(str, str)
+    max_copy_bytes = 64 << 20  # Bigger selections would not fit an editor tab anyway
+
+    def __init__(self, file_path, settings_manager, parent=None):
+        super().__init__(parent)
+        self.current_file = file_path
+        self.settings_manager = settings_manager
+        self._file = open(file_path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            # An empty file cannot be mapped
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        except Exception:
+            self._file.close()
+            raise
+        self.index = LineIndex(self.buffer)
+        self._search = None  # Generator of the search in progress
+        self._found = None  # Match waiting for the index to reach it
+        self._search_timer = QTimer(self)
+        self._search_timer.setInterval(0)
+        self._search_timer.timeout.connect(self._search_step)
+        self.setup_ui()
+
+        self.indexer = LineIndexer(self.index, self)
+        self.indexer.progress.connect(self.handle_index_progress)
+        self.indexer.indexFinished.connect(self.handle_index_progress)
+        self.indexer.start()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+
+        self.viewer = FileViewerWidget(self.index, self.settings_manager.get_font(), self)
+        self.viewer.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.viewer.customContextMenuRequested.connect(self.show_context_menu)
+        layout.addWidget(self.viewer)
+
+        # Find toolbar (initially hidden)
+        self.find_toolbar = QWidget(self)
+        self.find_toolbar.setVisible(False)
+        self.find_toolbar.setFixedHeight(32)
+        find_layout = QHBoxLayout(self.find_toolbar)
+        find_layout.setContentsMargins(4, 2, 4, 2)
+        find_layout.setSpacing(4)
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("Find")
+        self.find_input.setFixedHeight(24)
+        self.find_input.returnPressed.connect(self.find_text)
+        find_layout.addWidget(self.find_input)
+        find_prev_btn = QPushButton("↑")
+        find_next_btn = QPushButton("↓")
+        find_prev_btn.setFixedSize(24, 24)
+        find_next_btn.setFixedSize(24, 24)
+        find_prev_btn.clicked.connect(lambda: self.find_text(direction='up'))
+        find_next_btn.clicked.connect(lambda: self.find_text(direction='down'))
+        find_layout.addWidget(find_prev_btn)
+        find_layout.addWidget(find_next_btn)
+        close_btn = QPushButton("×")
+        close_btn.setFixedSize(24, 24)
+        close_btn.clicked.connect(self.toggle_find)
+        find_layout.addWidget(close_btn)
+        layout.addWidget(self.find_toolbar)
+
+        self.status_label = QLabel()
+        self.status_label.setContentsMargins(4, 2, 4, 2)
+        layout.addWidget(self.status_label)
+        self.update_status()
+
+    def update_status(self, message=None):
+        """Show file size, line count and what the tab is busy with"""
+        size = self.index.size / (1 << 20)
+        if self.index.total_lines is None:
+            status = f"{size:.1f} MB | Indexing lines... {self.index.line_count():,}"
+        else:
+            status = f"{size:.1f} MB | {self.index.total_lines:,} lines | Read-only"
+        if message:
+            status += f" | {message}"
+        self.status_label.setText(status)
+
+    def handle_index_progress(self, _lines):
+        """Let the scroll bar reach the lines indexed so far"""
+        self.viewer.update_scroll_range()
+        self.viewer.viewport().update()
+        self.update_status()
+
+    def close_file(self):
+        """Stop background work and unmap the file"""
+        self._stop_search()
+        self.indexer.stop()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self._file.close()
+
+    def selected_text(self):
+        """Decoded text of the selected lines, or None if it is too big to copy"""
+        start, end = self.viewer.selected_range()
+        if end - start > self.max_copy_bytes:
+            QMessageBox.warning(self, "Selection Too Large",
+                                f"Select at most {self.max_copy_bytes >> 20} MB to copy.")
+            return None
+        text = self.buffer[start:end].decode('utf-8', errors='replace')
+        return text.replace('\r\n', '\n')
+
+    def copy_selection(self):
+        """Copy the selected lines to the clipboard"""
+        text = self.selected_text()
+        if text is not None:
+            QApplication.clipboard().setText(text)
+
+    def open_selection_in_editor(self):
+        """Open the selected lines in a new editor tab"""
+        text = self.selected_text()
+        if text is not None:
+            first = min(self.viewer.anchor_line, self.viewer.cursor_line) + 1
+            self.openInEditor.emit(text, f"{os.path.basename(self.current_file)}:{first}")
+
+    def show_context_menu(self, pos):
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy")
+        copy_action.setShortcut(QKeySequence.Copy)
+        copy_action.triggered.connect(self.copy_selection)
+        menu.addAction("Open in Editor Tab", self.open_selection_in_editor)
+        menu.addSeparator()
+        menu.addAction("Find", self.toggle_find)
+        menu.exec_(self.viewer.mapToGlobal(pos))
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy_selection()
+        else:
+            super().keyPressEvent(event)
+
+    def toggle_find(self):
+        """Toggle find toolbar visibility"""
+        visible = not self.find_toolbar.isVisible()
+        self.find_toolbar.setVisible(visible)
+        if visible:
+            self.find_input.setFocus()
+            self.find_input.selectAll()
+        else:
+            self._stop_search()
+            self.viewer.match = None
+            self.viewer.viewport().update()
+            self.viewer.setFocus()
+
+    def find_text(self, direction='down'):
+        """Search the mapped file from the current line, wrapping around
+
+        The search runs over several event-loop turns. Like the editor's
+        find it ignores case, though only for ASCII letters.
+        """
+        text = self.find_input.text()
+        if not text or not self.index.size:
+            return
+        match = self.viewer.match
+        if match and match[0] == self.viewer.cursor_line:
+            origin = match[2] if direction == 'down' else match[1]
+        else:
+            origin = self.index.line_offset(self.viewer.cursor_line) or 0
+        self._stop_search()
+        self._search = self._search_steps(text.encode('utf-8').lower(), origin, direction == 'up')
+        self.update_status("Searching...")
+        self._search_timer.start()
+
+    def _search_steps(self, needle, origin, backward):
+        """Yield None after each slice searched, then the match span or False"""
+        # Each slice is copied out and lowercased; overlapping slices by the
+        # needle's length keeps matches that cross a slice boundary
+        buffer = self.buffer
+        size = len(buffer)
+        overlap = len(needle) - 1
+        if not backward:
+            for start, stop in ((origin, size), (0, origin)):
+                position = start
+                while position < stop:
+                    end = min(position + SEARCH_BYTES + overlap, stop)
+                    found = buffer[position:end].lower().find(needle)
+                    if found != -1:
+                        yield position + found, position + found + len(needle)
+                        return
+                    position += SEARCH_BYTES
+                    yield None
+        else:
+            for start, stop in ((origin, 0), (size, origin)):
+                position = start
+                while position > stop:
+                    begin = max(position - SEARCH_BYTES - overlap, stop)
+                    found = buffer[begin:position].lower().rfind(needle)
+                    if found != -1:
+                        yield begin + found, begin + found + len(needle)
+                        return
+                    position -= SEARCH_BYTES
+                    yield None
+        yield False
+
+    def _search_step(self):
+        """Search one slice of the file, then show the match if found"""
+        if self._search is None:
+            self._search_timer.stop()
+            return
+        result = self._found or next(self._search, False)
+        if result is None:
+            return
+        if result is False:
+            self._stop_search()
+            self.update_status("Not found")
+            return
+        start, end = result
+        line = self.index.line_at(start)
+        if line is None:
+            # The index has not reached the match yet; look again shortly
+            self._found = result
+            self._search_timer.setInterval(50)
+            return
+        self._stop_search()
+        self.viewer.match = (line, start, end)
+        self.viewer.anchor_line = self.viewer.cursor_line = line
+        self.viewer.ensure_visible(line, center=True)
+        self.viewer.viewport().update()
+        self.update_status(f"Line {line + 1:,}")
+
+    def _stop_search(self):
+        self._search_timer.stop()
+        self._search_timer.setInterval(0)
+        self._search = None
+        self._found = None
@@ -0,0 +1,119 @@
+from word_tokenizer import (WORD_PATTERN, SCRIPT_TABLE, SCRIPT_ARABIC, SCRIPT_HEBREW,
+                            SCRIPT_CYRILLIC, SCRIPT_GREEK)
+
+# Cheap per-language evidence: frequent short words, letters with
+# diacritics that are rare elsewhere and common letter trigrams. Words
+# that are common in more than one of these languages (a, la, de, en, on,
+# que, no...) are left out, as they say nothing about which one it is.
+LANGUAGE_PROFILES = {
+    'en_US': {
+        'words': {'the', 'and', 'of', 'to', 'in', 'is', 'that', 'it', 'was', 'for',
+                  'with', 'as', 'he', 'she', 'they', 'his', 'her', 'at', 'by',
+                  'said', 'from', 'have', 'has', 'be', 'are', 'were', 'this', 'will'},
+        'letters': '',
+        'trigrams': {'the', 'ing', 'and', 'hat', 'tha', 'ion', 'her', 'ter',
+                     'was', 'wit', 'ith', 'ght', 'oul'},
+    },
+    'fr_FR': {
+        'words': {'le', 'les', 'des', 'et', 'est', 'une', 'du', 'qui', 'dans',
+                  'pour', 'pas', 'sur', 'au', 'aux', 'ce', 'il', 'elle', 'nous',
+                  'vous', 'avec', 'sont', 'été', 'mais', 'ont'},
+        'letters': 'èêàâçëîïôùûœ',
+        'trigrams': {'les', 'des', 'ait', 'eur', 'eme', 'ais', 'dan', 'eau'},
+    },
+    'es_ES': {
+        'words': {'el', 'los', 'las', 'una', 'por', 'con', 'para', 'del', 'al', 'lo',
+                  'como', 'más', 'pero', 'está', 'fue', 'han', 'sus', 'muy'},
+        'letters': 'ñáíóú¿¡',
+        'trigrams': {'ión', 'ado', 'los', 'ien', 'dad', 'las', 'aci', 'ada'},
+    },
+}
+
+# Languages not written in Latin letters, by language code
+LANGUAGE_SCRIPTS = {
+    'fa': SCRIPT_ARABIC, 'ar': SCRIPT_ARABIC, 'ur': SCRIPT_ARABIC,
+    'he': SCRIPT_HEBREW, 'ru': SCRIPT_CYRILLIC, 'uk': SCRIPT_CYRILLIC,
+    'bg': SCRIPT_CYRILLIC, 'el': SCRIPT_GREEK,
+}
+
+MIN_EVIDENCE = 3  # Below this score the text is too short to tell
+SWITCH_MARGIN = 6  # How far another language must lead the default to win
+SAMPLE_CHARS = 1000  # Long paragraphs are judged by their start
+
+def _build_votes(kind):
+    """Map each word, letter or trigram to the languages it points to"""
+    votes = {}
+    for language, profile in LANGUAGE_PROFILES.items():
+        for item in profile[kind]:
+            votes.setdefault(item, []).append(language)
+    return votes
+
+WORD_VOTES = _build_votes('words')
+LETTER_VOTES = _build_votes('letters')
+TRIGRAM_VOTES = _build_votes('trigrams')
+
+def detect_language(text, languages):
+    """Return the most likely of languages for text, or None if unsure
+
+    The first of languages is the default. Another language is only
+    returned when it clearly outscores the default, so a short line with
+    a name or a borrowed word in it is not taken for a foreign one.
+    """
+    if len(languages) == 1:
+        return languages[0]
+    
+    sample = text[:SAMPLE_CHARS].lower()
+    scores = dict.fromkeys(languages, 0)
+    
+    def vote(candidates, weight):
+        for language in candidates:
+            if language in scores:
+                scores[language] += weight
+    
+    for letter, candidates in LETTER_VOTES.items():
+        count = sample.count(letter)
+        if count:
+            vote(candidates, 2 * count)
+    
+    # Words in other scripts match no profile, so need no filtering
+    for word in WORD_PATTERN.findall(sample):
+        candidates = WORD_VOTES.get(word)
+        if candidates:
+            vote(candidates, 3)
+        for index in range(len(word) - 2):
+            candidates = TRIGRAM_VOTES.get(word[index:index + 3])
+            if candidates:
+                vote(candidates, 1)
+    
+    language = max(scores, key=scores.get)
+    if scores[language] < MIN_EVIDENCE:
+        return None
+    if language != languages[0] and scores[language] - scores[languages[0]] < SWITCH_MARGIN:
+        return None
+    return language
+
+def shows_language(text, language):
+    """Whether text has any sign of language: its script, special letters or stopwords"""
+    script = LANGUAGE_SCRIPTS.get(language.split('_')[0])
+    if script is not None:
+        return any(SCRIPT_TABLE[ord(char)] == script for char in text if ord(char) <= 0xFFFF)
+    profile = LANGUAGE_PROFILES.get(language)
+    if profile is None:
+        return False
+    sample = text[:SAMPLE_CHARS].lower()
+    return (any(letter in sample for letter in profile['letters'])
+            or any(word in profile['words'] for word in WORD_PATTERN.findall(sample)))
+
+def resolve_language(text, languages, previous=None):
+    """Return the language to check text in, never None
+
+    Text too short to detect follows the previous paragraph's language
+    only if it shows signs of it, so a short English label after a
+    foreign paragraph is still checked in the default language.
+    """
+    language = detect_language(text, languages)
+    if language is not None:
+        return language
+    if previous in languages and shows_language(text, previous):
+        return previous
+    return languages[0]
@@ -4,15 +4,18 @@ if sys.version_info < (3, 10):
     sys.exit(1)
 
 import os
-import json
 import hashlib
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, 
                             QVBoxLayout, QHBoxLayout, QSplitter, QMenu, QToolBar, QAction, QStyle, QMessageBox, QFontDialog, QStyleFactory, QLabel, QDialog, QSizePolicy, QDialogButtonBox, QTabBar, QFileDialog, QShortcut, QToolButton)
 from PyQt5.QtCore import Qt, QUrl, QTimer
 from PyQt5.QtWebEngineWidgets import QWebEngineView
-from editor_tab import EditorTab
+from editor_tab import EditorTab, SpellCheckService
+from autosave import AutosaveScheduler
+from edit_journal import replay_ops
+from session_store import SessionStore
 from snippet_manager import SnippetManager
 from rss_tab import RSSTab
+from file_viewer_tab import FileViewerTab
 import feedparser
 from PyQt5.QtGui import QIcon, QDesktopServices, QKeySequence
 from theme_manager import ThemeManager
@@ -20,6 +23,7 @@ from settings_manager import SettingsManager
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import QByteArray
 from settings_dialog import SettingsDialog
+from version_history_dialog import VersionHistoryDialog
 from PyQt5.QtGui import QFont
 from PyQt5.QtSvg import QSvgRenderer
 from PyQt5.QtGui import QPainter
@@ -123,6 +127,7 @@ class TextEditorApp(QMainWindow):
         self.tab_widget = QTabWidget()
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
+        self.tab_widget.currentChanged.connect(self.update_editor_actions)
         self.tab_widget.setStyleSheet("""
             QTabWidget::tab-bar {
                 alignment: left;
@@ -134,7 +139,11 @@ class TextEditorApp(QMainWindow):
         
         layout.addWidget(self.tab_widget)
         
+        # One scheduler autosaves all editor tabs, current tab first
+        self.autosave_scheduler = AutosaveScheduler(self.settings_manager, self.tab_widget, self)
         
+        # Reopen what a crashed session left behind
+        self.check_crash_recovery()
         
         # Create new tab if no tabs were restored
         if self.tab_widget.count() == 0:
@@ -353,6 +362,8 @@ class TextEditorApp(QMainWindow):
         
         # Add actions to dropdown menu
         self.menu_dropdown.addAction(create_action("settings", "Settings", self.show_settings))
+        self.menu_dropdown.addAction(create_action("history", "Version History", self.show_version_history))
+        self.menu_dropdown.addAction(create_action("open", "Open in Viewer", self.open_in_viewer))
         self.menu_dropdown.addSeparator()
         self.menu_dropdown.addAction(create_action("help", "Help", self.show_help))
         self.menu_dropdown.addAction(create_action("about", "About", self.show_about))
@@ -431,6 +442,9 @@ class TextEditorApp(QMainWindow):
 
         self.toolbar.addAction(create_action("zoom-reset", "Reset Zoom", self.zoom_reset))
         
+        # Only editor tabs can be saved or show the side panes
+        self.editor_actions = [save_action, save_as_action, snippets_action, browser_action]
+        
         # Add flexible space
         spacer = QWidget()
         spacer.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -449,9 +463,15 @@ class TextEditorApp(QMainWindow):
         # Use a single-shot timer to ensure the overflow button exists
         QTimer.singleShot(0, update_overflow_button)
 
+    def update_editor_actions(self):
+        """Enable the actions that need an editor tab only while one is current"""
+        enabled = isinstance(self.tab_widget.currentWidget(), EditorTab)
+        for action in self.editor_actions:
+            action.setEnabled(enabled)
+
     def get_current_editor(self):
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if current_tab and isinstance(current_tab, EditorTab):
             return current_tab.editor
         return None
         
@@ -471,6 +491,10 @@ class TextEditorApp(QMainWindow):
             editor.cut()
             
     def copy(self):
+        current_tab = self.tab_widget.currentWidget()
+        if isinstance(current_tab, FileViewerTab):
+            current_tab.copy_selection()
+            return
         editor = self.get_current_editor()
         if editor:
             editor.copy()
@@ -489,7 +513,7 @@ class TextEditorApp(QMainWindow):
         """Handle tab close"""
         tab = self.tab_widget.widget(index)
         
-        if tab.editor.document().isModified():
+        if isinstance(tab, EditorTab) and tab.editor.document().isModified():
             reply = QMessageBox.question(
                 self,
                 "Unsaved Changes",
@@ -499,12 +523,18 @@ class TextEditorApp(QMainWindow):
             
             if reply == QMessageBox.Save:
                 self.tab_widget.setCurrentIndex(index)
-                if not tab.save_file():  # If save is cancelled
+                if not tab.save_file(wait=True):  # If save is cancelled or failed
                     return
             elif reply == QMessageBox.Cancel:
                 return
         
         self.tab_widget.removeTab(index)
+        if isinstance(tab, EditorTab):
+            tab.stop_loading()
+            tab.discard_background_work()
+            self.autosave_scheduler.forget(tab)
+        elif isinstance(tab, FileViewerTab):
+            tab.close_file()
         
         # Create new tab if last tab was closed
         if self.tab_widget.count() == 0:
@@ -555,18 +585,19 @@ class TextEditorApp(QMainWindow):
 
     def save_file(self):
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if isinstance(current_tab, EditorTab):
             current_tab.save_file()
             
     def open_file(self):
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if isinstance(current_tab, EditorTab):
             current_tab.open_file()
 
     def new_editor_tab(self):
         """Create a new empty editor tab"""
         editor_tab = EditorTab(self.snippet_manager, self.settings_manager)
         editor_tab.set_main_window(self)  # Set reference to main window
+        editor_tab.loadStopped.connect(lambda: self.close_loading_tab(editor_tab))
         
         # Add tab with default title
         self.tab_widget.addTab(editor_tab, f"Document {self.tab_widget.count() + 1}")
@@ -617,52 +648,87 @@ class TextEditorApp(QMainWindow):
     def toggle_snippets(self):
         """Toggle snippets pane in current tab"""
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if isinstance(current_tab, EditorTab):
             current_tab.toggle_pane("snippets")
 
     def open_file_path(self, file_path):
         """Open a file by its path"""
+        if self.is_viewer_size(file_path):
+            return self.open_in_viewer(file_path)
+        tab = self.new_editor_tab()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                tab = self.new_editor_tab()
-                tab.editor.setPlainText(content)
-                tab.current_file = file_path
-                current_index = self.tab_widget.indexOf(tab)
-                self.tab_widget.setTabText(current_index, os.path.basename(file_path))
-                return True
+            tab.load_file(file_path)  # Big files finish loading in the background
         except Exception as e:
             print(f"Failed to open file {file_path}: {str(e)}")
+            self.tab_widget.removeTab(self.tab_widget.indexOf(tab))
+            self.autosave_scheduler.forget(tab)
+            return False
+        current_index = self.tab_widget.indexOf(tab)
+        self.tab_widget.setTabText(current_index, os.path.basename(file_path))
+        return True
+
+    def is_viewer_size(self, file_path):
+        """Whether a file is too big for an editor tab and opens read-only"""
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            return False  # Opening reports the error
+        return size > self.settings_manager.get_setting('viewer_threshold_mb', 256) * 1024 * 1024
+
+    def open_in_viewer(self, file_path=None):
+        """Open a file in a read-only viewer tab"""
+        if not file_path:
+            file_path, _ = QFileDialog.getOpenFileName(self, "Open in Viewer", "",
+                                                       "Text Files (*.txt);;All Files (*.*)")
+            if not file_path:
+                return False
+        try:
+            viewer_tab = FileViewerTab(file_path, self.settings_manager)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not open file: {str(e)}")
             return False
+        viewer_tab.openInEditor.connect(self.open_text_in_editor)
+        self.tab_widget.addTab(viewer_tab, os.path.basename(file_path))
+        self.tab_widget.setCurrentWidget(viewer_tab)
+        viewer_tab.viewer.setFocus()
+        return True
+
+    def open_text_in_editor(self, text, title):
+        """Open text copied out of a viewer tab in a new editor tab"""
+        tab = self.new_editor_tab()
+        tab.editor.setPlainText(text)
+        self.tab_widget.setTabText(self.tab_widget.indexOf(tab), title)
+
+    def close_loading_tab(self, tab):
+        """Close a tab whose file stopped loading before the end"""
+        index = self.tab_widget.indexOf(tab)
+        if index >= 0:
+            self.close_tab(index)
 
     def check_crash_recovery(self):
         """Check for and recover unsaved files from crash"""
-        recovery_dir = self.settings_manager.get_recovery_dir()
-        recovery_files = []
-        
-        # Find all recovery files with their metadata
-        for filename in os.listdir(recovery_dir):
-            if filename.endswith('.txt'):
-                file_path = os.path.join(recovery_dir, filename)
-                meta_path = file_path + '.json'
-                
-                try:
-                    # Only recover if metadata exists and shows no clean exit
-                    if os.path.exists(meta_path):
-                        with open(meta_path, 'r') as f:
-                            metadata = json.load(f)
-                            
-                        if not metadata.get('clean_exit', False):
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                if content.strip():  # Only recover non-empty files
-                                    recovery_files.append((file_path, content, metadata))
-                except:
-                    continue
+        try:
+            store = SessionStore(self.autosave_scheduler.database_path)
+            try:
+                recovery_files = []
+                for tab_id, content, metadata, ops in store.recover():
+                    # The checkpoint plus the edits journaled after it
+                    content = replay_ops(content, ops)
+                    if content.strip():  # Only recover non-empty files
+                        recovery_files.append((tab_id, content, metadata))
+                # The recovered tabs keep their rows until they autosave
+                # again, so crashing before then loses nothing
+                store.resume(recovery_files)
+            finally:
+                store.close()
+        except Exception as e:
+            print(f"Failed to check for crash recovery: {str(e)}")
+            return
         
         # Automatically recover files that weren't cleanly exited
-        for file_path, content, metadata in recovery_files:
+        for tab_id, content, metadata in recovery_files:
             tab = self.new_editor_tab()
+            tab.recovery_id = tab_id  # Keeps the version history of unsaved documents
             tab.editor.setPlainText(content)
             
             # Restore cursor and scroll position
@@ -682,6 +748,13 @@ class TextEditorApp(QMainWindow):
             # Store original file path if it existed
             if original_file:
                 tab.current_file = original_file
+            tab.encoding = metadata.get('encoding', 'utf-8')
+
+    def word_indexes(self):
+        """Word indexes of all editor tabs, for completion across documents"""
+        return [self.tab_widget.widget(i).word_index
+                for i in range(self.tab_widget.count())
+                if isinstance(self.tab_widget.widget(i), EditorTab)]
 
     def get_open_files(self):
         """Get list of currently open files"""
@@ -700,6 +773,13 @@ class TextEditorApp(QMainWindow):
                 'geometry': self.saveGeometry().toBase64().data().decode(),
                 'state': self.saveState().toBase64().data().decode()
             })
+            self.snippet_manager.save_usage()
+            for i in range(self.tab_widget.count()):
+                if isinstance(self.tab_widget.widget(i), EditorTab):
+                    self.tab_widget.widget(i).stop_loading()
+                elif isinstance(self.tab_widget.widget(i), FileViewerTab):
+                    self.tab_widget.widget(i).close_file()
+            self.autosave_scheduler.finish_session()
             event.accept()
         else:
             event.ignore()
@@ -788,7 +868,7 @@ class TextEditorApp(QMainWindow):
     def zoom_in(self):
         """Increase editor font size"""
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if isinstance(current_tab, EditorTab):
             current_font = current_tab.current_font  # Use stored font
             new_font = QFont(current_font)  # Create new font based on current
             new_font.setPointSize(current_font.pointSize() + 1)
@@ -797,7 +877,7 @@ class TextEditorApp(QMainWindow):
     def zoom_out(self):
         """Decrease editor font size"""
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if isinstance(current_tab, EditorTab):
             current_font = current_tab.current_font  # Use stored font
             size = current_font.pointSize()
             if size > 1:  # Prevent font from becoming too small
@@ -808,7 +888,7 @@ class TextEditorApp(QMainWindow):
     def zoom_reset(self):
         """Reset editor font to default size"""
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if isinstance(current_tab, EditorTab):
             default_font = self.settings_manager.get_font()
             # Preserve current font properties except size
             new_font = QFont(current_tab.current_font)
@@ -817,29 +897,53 @@ class TextEditorApp(QMainWindow):
 
     
 
+    def show_version_history(self):
+        """Show stored versions of the current document and restore one"""
+        tab = self.tab_widget.currentWidget()
+        if not isinstance(tab, EditorTab):
+            return
+        self.autosave_scheduler.flush()  # Include the latest checkpoint
+        dialog = VersionHistoryDialog(self.autosave_scheduler.history_path,
+                                      tab.history_key(), self)
+        if dialog.exec_() == QDialog.Accepted and dialog.selected_text is not None:
+            # Replace as one edit, so undo brings the current text back
+            cursor = tab.editor.textCursor()
+            cursor.beginEditBlock()
+            cursor.select(cursor.Document)
+            cursor.insertText(dialog.selected_text)
+            cursor.endEditBlock()
+
     def show_settings(self):
         """Show settings dialog"""
         dialog = SettingsDialog(self.settings_manager, self)
         if dialog.exec_() == QDialog.Accepted:
             settings = dialog.get_data()
             
+            user_dictionary = self.settings_manager.user_dictionary
+            old_words = set(user_dictionary.words())
+            
             # Save settings
             self.settings_manager.save_setting('homepage', settings['homepage'])
             self.settings_manager.save_setting('search_sites', settings['search_sites'])
-            self.settings_manager.save_setting('user_dictionary', settings['user_dictionary'])
+            user_dictionary.set_words(settings['user_dictionary'])
+            
+            # Push dictionary edits to every open tab's spell checker
+            new_words = set(settings['user_dictionary'])
+            SpellCheckService.instance().update_words(added=new_words - old_words,
+                                                      removed=old_words - new_words)
             self.settings_manager.save_setting('ui_theme', settings['ui_theme'])
             self.apply_ui_theme(settings['ui_theme'])  # Apply the new theme immediately
 
     def toggle_browser(self):
         """Toggle browser pane in current tab"""
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if isinstance(current_tab, EditorTab):
             current_tab.toggle_pane("browser")
 
     def toggle_find(self):
         """Toggle find/replace in current editor tab"""
         current_tab = self.tab_widget.currentWidget()
-        if current_tab and isinstance(current_tab, EditorTab):
+        if current_tab and isinstance(current_tab, (EditorTab, FileViewerTab)):
             current_tab.toggle_find()
 
     def save_file_as(self):
@@ -874,8 +978,10 @@ class TextEditorApp(QMainWindow):
     def open_file_dialog(self):
         """Open file from dialog"""
         current_tab = self.tab_widget.currentWidget()
-        if current_tab:
+        if isinstance(current_tab, EditorTab):
             current_tab.open_file()
+        else:
+            self.open_file()  # In a new tab
 
     def open_file(self, file_path=None):
         """Open a file in a new tab"""
@@ -889,15 +995,17 @@ class TextEditorApp(QMainWindow):
             )
             if not file_path:  # User cancelled
                 return
+        if self.is_viewer_size(file_path):
+            self.open_in_viewer(file_path)
+            return
 
         # Create new tab and load file
         editor_tab = EditorTab(self.snippet_manager, self.settings_manager)
         editor_tab.set_main_window(self)  # Set main window reference
+        editor_tab.loadStopped.connect(lambda: self.close_loading_tab(editor_tab))
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                editor_tab.editor.setPlainText(f.read())
-                editor_tab.current_file = file_path
+            editor_tab.load_file(file_path)  # Big files finish loading in the background
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not open file: {str(e)}")
             return
@@ -919,7 +1027,7 @@ class TextEditorApp(QMainWindow):
         unsaved_tabs = []
         for i in range(self.tab_widget.count()):
             tab = self.tab_widget.widget(i)
-            if tab.editor.document().isModified():
+            if isinstance(tab, EditorTab) and tab.editor.document().isModified():
                 unsaved_tabs.append(i)
         
         if unsaved_tabs:
@@ -933,7 +1041,7 @@ class TextEditorApp(QMainWindow):
             if reply == QMessageBox.Save:
                 for i in unsaved_tabs:
                     self.tab_widget.setCurrentIndex(i)
-                    if not self.tab_widget.widget(i).save_file():  # If save is cancelled
+                    if not self.tab_widget.widget(i).save_file(wait=True):  # If save is cancelled or failed
                         return False
                 return True
             elif reply == QMessageBox.Cancel:
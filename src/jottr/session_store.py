@@ -0,0 +1,148 @@
+import hashlib
+import json
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tabs (
+    tab_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL DEFAULT 0,
+    content TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    journal_epoch INTEGER NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY,
+    tab_id TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    op TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS journal_by_tab ON journal (tab_id, epoch, seq);
+CREATE TABLE IF NOT EXISTS session (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Every open tab's checkpoint followed by the journaled edits made after it
+RECOVERY_QUERY = """
+SELECT tabs.tab_id, tabs.content, tabs.metadata, journal.op
+FROM tabs LEFT JOIN journal
+    ON journal.tab_id = tabs.tab_id AND journal.epoch >= tabs.journal_epoch
+ORDER BY tabs.position, tabs.tab_id, journal.seq
+"""
+
+def content_checksum(text):
+    """Checksum autosave uses to tell whether content changed"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class SessionStore:
+    """Autosaved tabs, their edit journals and the clean-exit flag in one SQLite file
+
+    Use one store per thread.
+    """
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=10)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=FULL")  # Each commit is durable
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def write_round(self, snapshots, journal_ops, removed_tabs, tab_order=None, clean_exit=None):
+        """Write one autosave round as a single transaction
+
+        snapshots are AutosaveSnapshots, journal_ops maps tab id to
+        [(epoch, op)]. Returns the content checksum of each snapshot's tab.
+        """
+        checksums = {}
+        with self.connection:
+            cursor = self.connection.cursor()
+            # Journal rows first; a checkpoint in the same round then drops
+            # the ones it already contains
+            cursor.executemany(
+                "INSERT INTO journal (tab_id, epoch, op) VALUES (?, ?, ?)",
+                [(tab_id, epoch, json.dumps(op))
+                 for tab_id, ops in journal_ops.items() for epoch, op in ops])
+            for snapshot in snapshots:
+                checksums[snapshot.tab_id] = self._write_snapshot(cursor, snapshot)
+            for tab_id in removed_tabs:
+                cursor.execute("DELETE FROM tabs WHERE tab_id = ?", (tab_id,))
+                cursor.execute("DELETE FROM journal WHERE tab_id = ?", (tab_id,))
+            if tab_order is not None:
+                cursor.executemany("UPDATE tabs SET position = ? WHERE tab_id = ?",
+                                   [(position, tab_id) for position, tab_id in enumerate(tab_order)])
+            if clean_exit is not None:
+                cursor.execute("INSERT OR REPLACE INTO session (key, value) VALUES ('clean_exit', ?)",
+                               ('1' if clean_exit else '0',))
+
+        # Paranoid mode: make sure what the database returns is what we wrote
+        for snapshot in snapshots:
+            if snapshot.verify:
+                row = self.connection.execute("SELECT content FROM tabs WHERE tab_id = ?",
+                                              (snapshot.tab_id,)).fetchone()
+                if row is None or content_checksum(row[0]) != checksums[snapshot.tab_id]:
+                    raise ValueError("Content verification failed")
+        return checksums
+
+    def _write_snapshot(self, cursor, snapshot):
+        """Store a checkpoint, leaving unchanged content alone"""
+        checksum = content_checksum(snapshot.text)
+        epoch = snapshot.metadata['journal_epoch']
+        metadata = json.dumps(dict(snapshot.metadata, checksum=checksum))
+        row = cursor.execute("SELECT checksum FROM tabs WHERE tab_id = ?",
+                             (snapshot.tab_id,)).fetchone()
+        if row is None:
+            cursor.execute("INSERT INTO tabs (tab_id, content, checksum, journal_epoch, metadata) "
+                           "VALUES (?, ?, ?, ?, ?)",
+                           (snapshot.tab_id, snapshot.text, checksum, epoch, metadata))
+        elif row[0] != checksum:
+            cursor.execute("UPDATE tabs SET content = ?, checksum = ?, journal_epoch = ?, "
+                           "metadata = ? WHERE tab_id = ?",
+                           (snapshot.text, checksum, epoch, metadata, snapshot.tab_id))
+        else:
+            cursor.execute("UPDATE tabs SET journal_epoch = ?, metadata = ? WHERE tab_id = ?",
+                           (epoch, metadata, snapshot.tab_id))
+
+        # Edits before this checkpoint are in it
+        cursor.execute("DELETE FROM journal WHERE tab_id = ? AND epoch < ?",
+                       (snapshot.tab_id, epoch))
+        return checksum
+
+    def recover(self):
+        """Return [(tab id, checkpoint text, metadata, [op])] if the last session crashed"""
+        row = self.connection.execute(
+            "SELECT value FROM session WHERE key = 'clean_exit'").fetchone()
+        if row is None or row[0] == '1':
+            return []
+
+        tabs = []
+        for tab_id, content, metadata, op in self.connection.execute(RECOVERY_QUERY):
+            if not tabs or tabs[-1][0] != tab_id:
+                tabs.append((tab_id, content, json.loads(metadata), []))
+            if op is not None:
+                tabs[-1][3].append(json.loads(op))
+        return tabs
+
+    def resume(self, tabs):
+        """Start a session that has not exited yet, keeping only tabs
+
+        tabs are the recovered [(tab id, text, metadata)], text having
+        their journals replayed into it. Each becomes its tab's checkpoint,
+        so the new session's tabs can go on under the same ids.
+        """
+        with self.connection:
+            cursor = self.connection.cursor()
+            kept = [tab_id for tab_id, _, _ in tabs]
+            cursor.execute(f"DELETE FROM tabs WHERE tab_id NOT IN ({', '.join('?' * len(kept))})",
+                           kept)
+            cursor.execute("DELETE FROM journal")
+            for tab_id, text, metadata in tabs:
+                checksum = content_checksum(text)
+                metadata = json.dumps(dict(metadata, checksum=checksum, journal_epoch=0))
+                cursor.execute("UPDATE tabs SET content = ?, checksum = ?, journal_epoch = 0, "
+                               "metadata = ? WHERE tab_id = ?",
+                               (text, checksum, metadata, tab_id))
+            cursor.execute("INSERT OR REPLACE INTO session (key, value) "
+                           "VALUES ('clean_exit', '0')")
@@ -122,7 +122,7 @@ class SettingsDialog(QDialog):
 
     def load_user_dict(self):
         """Load user dictionary words"""
-        words = self.settings_manager.get_setting('user_dictionary', [])
+        words = self.settings_manager.user_dictionary.words()
         self.dict_list.addItems(words)
 
     def add_search_site(self):
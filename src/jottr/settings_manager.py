@@ -4,6 +4,7 @@ from PyQt5.QtGui import QFont
 import time
 from PyQt5.QtWidgets import QApplication, QStyleFactory
 import sys
+from user_dictionary import UserDictionary
 
 class SettingsManager:
     def __init__(self):
@@ -16,6 +17,18 @@ class SettingsManager:
             "theme": "default",
             "ui_theme": "light",
             "spell_check": True,
+            "spell_languages": ["en_US", "fr_FR", "es_ES"],
+            "spell_cache_size": 20000,
+            "large_document_threshold": 1000000,
+            "background_load_threshold": 1000000,
+            "viewer_threshold_mb": 256,
+            "legacy_encodings": ["cp1256", "cp1252"],
+            "save_workers": 2,
+            "completion_delay_ms": 40,
+            "autosave_interval_ms": 5000,
+            "autosave_budget_kb": 4096,
+            "autosave_checkpoint_interval_s": 300,
+            "autosave_verify": False,
             "search_sites": {
                 "AP News": "site:apnews.com",
                 "Reuters": "site:reuters.com",
@@ -50,9 +63,19 @@ class SettingsManager:
         # Create snippets directory
         os.makedirs(self.snippets_dir, exist_ok=True)
         
+        # Autosaved copies of open documents, for crash recovery
+        self.recovery_dir = os.path.join(self.config_dir, 'recovery')
+        os.makedirs(self.recovery_dir, exist_ok=True)
+        
         # Initialize settings
         self.load_settings()
         
+        # User dictionary keeps its own file so adding a word is a cheap append
+        self.user_dictionary = UserDictionary(
+            self.dict_file,
+            legacy_words=self.settings.pop('user_dictionary', None)
+        )
+        
         # # Create autosave directory
         # self.autosave_dir = os.path.join(os.path.expanduser("~"), ".ap_editor_autosave")
         # os.makedirs(self.autosave_dir, exist_ok=True)
@@ -275,6 +298,10 @@ class SettingsManager:
     #     # Don't clean up by default - let the session restore handle it
     #     pass
 
+    def get_recovery_dir(self):
+        """Directory holding autosaved documents"""
+        return self.recovery_dir
+
     def get_setting(self, key, default=None):
         """Get a setting value with a default fallback"""
         try:
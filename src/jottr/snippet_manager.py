@@ -1,15 +1,37 @@
 import json
 import os
+import re
+import time
+import heapq
+from bisect import bisect_right
+from math import log2
+from PyQt5.QtCore import QTimer
 
 class SnippetManager:
+    usage_save_delay = 30000  # Usage counts are written at most this often (ms)
+    recency_half_life = 7 * 86400  # Seconds until a use counts half as recent
+    max_pattern_chars = 32  # Longer typed words are matched on their start
+
     def __init__(self, settings_manager):
         self.settings_manager = settings_manager
         self.file_path = os.path.join(
             self.settings_manager.config_dir,
             'snippets.json'
         )
+        self.usage_path = os.path.join(
+            self.settings_manager.config_dir,
+            'snippet_usage.json'
+        )
         self.snippets = {}
+        self.usage = {}  # title -> [times inserted, last inserted]
+        self._usage_dirty = False
+        self._usage_timer = QTimer()
+        self._usage_timer.setSingleShot(True)
+        self._usage_timer.setInterval(self.usage_save_delay)
+        self._usage_timer.timeout.connect(self.save_usage)
+        self._titles = None  # Titles matched by complete(), rebuilt lazily
         self.load_snippets()
+        self.load_usage()
         
     def load_snippets(self):
         """Load snippets from file"""
@@ -20,13 +42,53 @@ class SnippetManager:
             except Exception as e:
                 print(f"Error loading snippets: {str(e)}")
                 self.snippets = {}
+        self._titles = None
                 
     def save_snippets(self):
         with open(self.file_path, 'w') as file:
             json.dump(self.snippets, file)
+
+    def load_usage(self):
+        """Load snippet usage statistics from file"""
+        if os.path.exists(self.usage_path):
+            try:
+                with open(self.usage_path, 'r', encoding='utf-8') as f:
+                    usage = json.load(f)
+                self.usage = {title: [int(count), float(last_used)]
+                              for title, (count, last_used) in usage.items()
+                              if title in self.snippets}
+            except Exception as e:
+                print(f"Error loading snippet usage: {str(e)}")
+                self.usage = {}
+
+    def save_usage(self):
+        """Write usage statistics if they changed since the last save"""
+        self._usage_timer.stop()
+        if not self._usage_dirty:
+            return
+        try:
+            temp_path = self.usage_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.usage, f)
+            os.replace(temp_path, self.usage_path)
+            self._usage_dirty = False
+        except Exception as e:
+            print(f"Error saving snippet usage: {str(e)}")
+
+    def record_use(self, title):
+        """Count an insertion of a snippet; saved together with later ones"""
+        if title not in self.snippets:
+            return
+        entry = self.usage.setdefault(title, [0, 0.0])
+        entry[0] += 1
+        entry[1] = time.time()
+        self._usage_dirty = True
+        if not self._usage_timer.isActive():
+            self._usage_timer.start()
             
     def add_snippet(self, title, text):
         self.snippets[title] = text
+        self._titles = None
         self.save_snippets()
         
     def get_snippet(self, title):
@@ -34,12 +96,87 @@ class SnippetManager:
         
     def get_snippets(self):
         return list(self.snippets.keys())
+
+    def _build_titles(self):
+        """Join casefolded titles into one string, a line per title, for regex matching"""
+        titles = list(self.snippets)
+        starts = []
+        position = 0
+        for title in titles:
+            starts.append(position)
+            position += len(title.casefold().replace('\n', ' ')) + 1
+        haystack = '\n'.join(title.casefold().replace('\n', ' ') for title in titles)
+        self._titles = (titles, starts, haystack)
+        return self._titles
+
+    def _usage_score(self, title, now):
+        """Score from how often and how recently a snippet was inserted"""
+        entry = self.usage.get(title)
+        if not entry:
+            return 0.0
+        count, last_used = entry
+        age = max(0.0, now - last_used)
+        return 2 * log2(1 + count) + 4 * 0.5 ** (age / self.recency_half_life)
+
+    def complete(self, prefix, limit=None):
+        """Return snippet titles containing the letters of prefix in order, best first
+
+        The first letter has to start a word of the title. Titles starting
+        with prefix, or with its letters close together, rank higher, as do
+        snippets inserted often or recently.
+        """
+        titles, starts, haystack = self._titles or self._build_titles()
+        if not titles:
+            return []
+        now = time.time()
+        if not prefix:
+            ranked = sorted(titles, key=lambda title: -self._usage_score(title, now))
+            return ranked[:limit] if limit is not None else ranked
+
+        chars = [re.escape(char) for char in prefix.casefold()[:self.max_pattern_chars]]
+        # Starting with a literal lets the regex engine skip ahead quickly
+        # Each gap stops at the first occurrence of the next letter, so a
+        # failed attempt gives up without backtracking through the title
+        body = chars[0] + ''.join(r'([^\n%s]*)%s' % (char, char) for char in chars[1:])
+        regex = re.compile(body)
+        word_start = re.compile(r'(?<!\w)' + body)
+        scored = []
+        position = 0
+        while True:
+            match = regex.search(haystack, position)
+            if match is None:
+                break
+            start = match.start()
+            line = bisect_right(starts, start) - 1
+            line_end = starts[line + 1] - 1 if line + 1 < len(starts) else len(haystack)
+            if start > starts[line] and (haystack[start - 1].isalnum() or haystack[start - 1] == '_'):
+                # Not at the start of a word, try the rest of this title
+                match = word_start.search(haystack, start + 1, line_end)
+                if match is None:
+                    position = line_end + 1
+                    continue
+                start = match.start()
+            gaps = [len(group) for group in match.groups()]
+            quality = 3.0 if start == starts[line] else 1.0
+            if not any(gaps):
+                quality += 2.0  # Typed letters appear together
+            quality -= min(2.0, 0.25 * sum(gaps))
+            title = titles[line]
+            scored.append((quality + self._usage_score(title, now), -len(title), title))
+            position = line_end + 1
+        if limit is None:
+            limit = len(scored)
+        return [title for _, _, title in heapq.nlargest(limit, scored)]
     
     def delete_snippet(self, title):
         if title in self.snippets:
             del self.snippets[title]
+            self._titles = None
+            if self.usage.pop(title, None) is not None:
+                self._usage_dirty = True
+                self.save_usage()
             self.save_snippets()
 
     def get_all_snippet_contents(self):
         """Return a list of all snippet contents"""
-        return list(self.snippets.values()) 
\ No newline at end of file
+        return list(self.snippets.values())
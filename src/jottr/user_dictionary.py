@@ -0,0 +1,88 @@
+import os
+from completion_index import CompletionIndex
+
+class UserDictionary:
+    """User-added words with O(1) membership and sorted prefix lookups"""
+    def __init__(self, file_path, legacy_words=None):
+        self.file_path = file_path
+        self._words = {}  # word -> None, keeps insertion order for display
+        self._folded = set()
+        self._index = CompletionIndex()  # Sorted for prefix lookups
+        self.load()
+
+        # Migrate the list that used to live in settings.json
+        if legacy_words and not os.path.exists(self.file_path):
+            self.set_words(legacy_words)
+
+    def load(self):
+        """Load words from file, one per line"""
+        words = []
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    words = [line.strip() for line in f if line.strip()]
+            except Exception as e:
+                print(f"Error loading user dictionary: {str(e)}")
+        self._rebuild(words)
+
+    def save(self):
+        """Rewrite the whole file atomically"""
+        temp_path = self.file_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.writelines(word + '\n' for word in self._words)
+            os.replace(temp_path, self.file_path)
+        except Exception as e:
+            print(f"Error saving user dictionary: {str(e)}")
+
+    def _rebuild(self, words):
+        """Rebuild every index from a list of words"""
+        self._words = dict.fromkeys(words)
+        self._folded = {word.casefold() for word in self._words}
+        self._index.rebuild(self._words)
+
+    def __contains__(self, word):
+        return word in self._words or word.casefold() in self._folded
+
+    def __len__(self):
+        return len(self._words)
+
+    def __iter__(self):
+        return iter(self.words())
+
+    def words(self):
+        """Return all words in the order they were added"""
+        return list(self._words)
+
+    def add(self, word):
+        """Add a word, appending it to the file; returns False if present"""
+        if word in self._words:
+            return False
+        self._words[word] = None
+        self._folded.add(word.casefold())
+        self._index.add(word)
+        try:
+            with open(self.file_path, 'a', encoding='utf-8') as f:
+                f.write(word + '\n')
+        except Exception as e:
+            print(f"Error saving user dictionary: {str(e)}")
+        return True
+
+    def remove(self, word):
+        """Remove a word; returns False if it was not present"""
+        if word not in self._words:
+            return False
+        del self._words[word]
+        self._index.remove(word)
+        self._folded = {word.casefold() for word in self._words}
+        self.save()
+        return True
+
+    def set_words(self, words):
+        """Replace the whole dictionary, e.g. from the settings dialog"""
+        self._rebuild([word for word in words if word])
+        self.save()
+
+    def prefix_matches(self, prefix, limit=None):
+        """Return words starting with prefix, ignoring case, in sorted order"""
+        return self._index.matches(prefix, limit)
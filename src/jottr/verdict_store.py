@@ -0,0 +1,46 @@
+import os
+import struct
+import zlib
+
+# magic, dictionary fingerprint, compressed sizes of the correct and
+# misspelled word lists
+MAGIC = b'JVC1'
+HEADER = struct.Struct('<4s16sII')
+
+def save_verdicts(path, fingerprint, verdicts):
+    """Write word -> verdict pairs atomically as two compressed word lists"""
+    correct = zlib.compress('\n'.join(
+        word for word, verdict in verdicts if verdict).encode('utf-8'))
+    misspelled = zlib.compress('\n'.join(
+        word for word, verdict in verdicts if not verdict).encode('utf-8'))
+    
+    temp_path = path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, fingerprint, len(correct), len(misspelled)))
+            f.write(correct)
+            f.write(misspelled)
+        os.replace(temp_path, path)
+    except Exception as e:
+        print(f"Error saving spell cache: {str(e)}")
+
+def load_verdicts(path, fingerprint):
+    """Return word -> verdict pairs saved for fingerprint; empty if missing or stale"""
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'rb') as f:
+            magic, saved_fingerprint, correct_size, misspelled_size = HEADER.unpack(
+                f.read(HEADER.size))
+            if magic != MAGIC or saved_fingerprint != fingerprint:
+                return []  # Different backend, language or user dictionary
+            correct = zlib.decompress(f.read(correct_size)).decode('utf-8')
+            misspelled = zlib.decompress(f.read(misspelled_size)).decode('utf-8')
+    except Exception as e:
+        print(f"Error loading spell cache: {str(e)}")
+        return []
+    
+    verdicts = [(word, True) for word in correct.split('\n') if word]
+    verdicts.extend((word, False) for word in misspelled.split('\n') if word)
+    return verdicts
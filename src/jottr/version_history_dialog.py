@@ -0,0 +1,67 @@
+import time
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem,
+                            QTextEdit, QPushButton, QLabel, QSplitter)
+from PyQt5.QtCore import Qt
+from version_store import VersionStore
+
+class VersionHistoryDialog(QDialog):
+    """Lists the stored versions of a document and previews the selected one"""
+    def __init__(self, history_path, document, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Version History")
+        self.setMinimumWidth(800)
+        self.setMinimumHeight(500)
+        self.store = VersionStore(history_path)
+        self.selected_text = None
+
+        layout = QVBoxLayout(self)
+        splitter = QSplitter(Qt.Horizontal)
+
+        self.version_list = QListWidget()
+        for version_id, created, size in self.store.list_versions(document):
+            label = f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))}  ({size} characters)"
+            item = QListWidgetItem(label)
+            item.setData(Qt.UserRole, version_id)
+            self.version_list.addItem(item)
+        self.version_list.currentItemChanged.connect(self.show_version)
+        splitter.addWidget(self.version_list)
+
+        # Only the selected version is rebuilt and held in memory
+        self.preview = QTextEdit()
+        self.preview.setReadOnly(True)
+        splitter.addWidget(self.preview)
+        splitter.setSizes([250, 550])
+        layout.addWidget(splitter)
+
+        if not self.version_list.count():
+            layout.addWidget(QLabel("No versions have been stored for this document yet."))
+
+        # Buttons
+        button_layout = QHBoxLayout()
+        self.restore_button = QPushButton("Restore")
+        self.restore_button.setEnabled(False)
+        close_button = QPushButton("Close")
+        button_layout.addStretch()
+        button_layout.addWidget(self.restore_button)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.restore_button.clicked.connect(self.accept)
+        close_button.clicked.connect(self.reject)
+        self.finished.connect(lambda _: self.store.close())
+
+        if self.version_list.count():
+            self.version_list.setCurrentRow(0)
+
+    def show_version(self, item, _previous=None):
+        """Rebuild and preview the selected version"""
+        if item is None:
+            return
+        try:
+            self.selected_text = self.store.restore(item.data(Qt.UserRole))
+            self.preview.setPlainText(self.selected_text)
+            self.restore_button.setEnabled(True)
+        except Exception as e:
+            self.selected_text = None
+            self.preview.setPlainText(f"Could not rebuild this version: {str(e)}")
+            self.restore_button.setEnabled(False)
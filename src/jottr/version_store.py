@@ -0,0 +1,163 @@
+import hashlib
+import sqlite3
+import time
+import zlib
+
+MIN_CHUNK_CHARS = 1024
+MAX_CHUNK_CHARS = 16384
+BOUNDARY_MASK = 0x7  # About one line in eight ends a chunk, once it is big enough
+DIGEST_SIZE = 16
+GROUP_MASK = 0x0F  # Manifests are grouped about sixteen chunks at a time
+MAX_GROUP = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id BLOB PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    document TEXT NOT NULL,
+    created REAL NOT NULL,
+    size INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    manifest BLOB NOT NULL  -- Digests of chunk groups, each listing chunk digests
+);
+CREATE INDEX IF NOT EXISTS versions_by_document ON versions (document, id);
+"""
+
+def chunk_text(text):
+    """Split text into chunks whose boundaries depend only on nearby content
+
+    A chunk ends after a line whose hash matches BOUNDARY_MASK, so an edit
+    changes the chunk it is in and leaves the others as they were.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for line in text.splitlines(keepends=True):
+        while len(line) > MAX_CHUNK_CHARS:
+            # A huge line gets fixed-size pieces
+            if current:
+                chunks.append(''.join(current))
+                current, size = [], 0
+            chunks.append(line[:MAX_CHUNK_CHARS])
+            line = line[MAX_CHUNK_CHARS:]
+        current.append(line)
+        size += len(line)
+        if size >= MAX_CHUNK_CHARS or (
+                size >= MIN_CHUNK_CHARS
+                and zlib.crc32(line.encode('utf-8', errors='surrogatepass')) & BOUNDARY_MASK == 0):
+            chunks.append(''.join(current))
+            current, size = [], 0
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+def group_digests(digests):
+    """Split a list of chunk digests into groups at content-defined boundaries"""
+    groups = []
+    current = []
+    for digest in digests:
+        current.append(digest)
+        if digest[0] & GROUP_MASK == 0 or len(current) >= MAX_GROUP:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+class VersionStore:
+    """Document versions as manifests of deduplicated, compressed chunks
+
+    The chunk digests of a version are themselves stored as chunks, in
+    groups, so a small edit adds one text chunk, one group and a short
+    manifest.
+
+    Use one store per thread.
+    """
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=10)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def add_version(self, document, text, checksum, created=None):
+        """Store text as the newest version of document, unless it is unchanged
+
+        Only chunks not stored for any earlier version take new space.
+        Returns the version id, or None if nothing was stored.
+        """
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT checksum FROM versions WHERE document = ? ORDER BY id DESC LIMIT 1",
+                (document,)).fetchone()
+            if row is not None and row[0] == checksum:
+                return None
+
+            chunks = {}
+            digests = []
+            for chunk in chunk_text(text):
+                data = chunk.encode('utf-8', errors='surrogatepass')
+                digest = hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+                chunks[digest] = data
+                digests.append(digest)
+            manifest = []
+            for group in group_digests(digests):
+                data = b''.join(group)
+                digest = hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+                chunks[digest] = data
+                manifest.append(digest)
+            stored = self._existing_chunks(list(chunks))
+            self.connection.executemany(
+                "INSERT INTO chunks (id, data) VALUES (?, ?)",
+                [(digest, zlib.compress(data)) for digest, data in chunks.items()
+                 if digest not in stored])
+            cursor = self.connection.execute(
+                "INSERT INTO versions (document, created, size, checksum, manifest) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (document, created or time.time(), len(text), checksum, b''.join(manifest)))
+            return cursor.lastrowid
+
+    def _existing_chunks(self, digests):
+        """Which of digests are already in the chunk store"""
+        existing = set()
+        for start in range(0, len(digests), 500):  # Stay under SQLite's variable limit
+            batch = digests[start:start + 500]
+            existing.update(row[0] for row in self.connection.execute(
+                "SELECT id FROM chunks WHERE id IN (%s)" % ','.join('?' * len(batch)), batch))
+        return existing
+
+    def list_versions(self, document):
+        """Return [(version id, created, size)] of document, newest first"""
+        return self.connection.execute(
+            "SELECT id, created, size FROM versions WHERE document = ? ORDER BY id DESC",
+            (document,)).fetchall()
+
+    def restore(self, version_id):
+        """Rebuild the text of one version from its chunks"""
+        row = self.connection.execute("SELECT manifest FROM versions WHERE id = ?",
+                                      (version_id,)).fetchone()
+        if row is None:
+            raise KeyError(version_id)
+        groups = self._load_chunks(self._split_digests(bytes(row[0])))
+        digests = self._split_digests(b''.join(groups))
+        return b''.join(self._load_chunks(digests)).decode('utf-8', errors='surrogatepass')
+
+    @staticmethod
+    def _split_digests(data):
+        return [data[i:i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE)]
+
+    def _load_chunks(self, digests):
+        """Decompressed data of each digest, in order"""
+        chunks = {}
+        unique = list(set(digests))
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            for digest, data in self.connection.execute(
+                    "SELECT id, data FROM chunks WHERE id IN (%s)" % ','.join('?' * len(batch)),
+                    batch):
+                chunks[bytes(digest)] = zlib.decompress(data)
+        return [chunks[digest] for digest in digests]
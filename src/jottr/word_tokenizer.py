@@ -0,0 +1,63 @@
+import re
+
+# Script classes returned by tokenize()
+SCRIPT_COMMON = 0  # Digits, underscore and other script-neutral characters
+SCRIPT_LATIN = 1
+SCRIPT_GREEK = 2
+SCRIPT_CYRILLIC = 3
+SCRIPT_HEBREW = 4
+SCRIPT_ARABIC = 5  # Arabic, Persian and Urdu
+SCRIPT_OTHER = 6
+
+# Code point ranges (inclusive) of each script within the BMP
+_SCRIPT_RANGES = [
+    (0x0041, 0x005A, SCRIPT_LATIN),
+    (0x0061, 0x007A, SCRIPT_LATIN),
+    (0x00AA, 0x00AA, SCRIPT_LATIN),
+    (0x00BA, 0x00BA, SCRIPT_LATIN),
+    (0x00C0, 0x024F, SCRIPT_LATIN),
+    (0x0300, 0x036F, SCRIPT_LATIN),  # Combining diacritics, almost always on Latin letters
+    (0x0370, 0x03FF, SCRIPT_GREEK),
+    (0x0400, 0x052F, SCRIPT_CYRILLIC),
+    (0x0590, 0x05FF, SCRIPT_HEBREW),
+    (0x0600, 0x06FF, SCRIPT_ARABIC),
+    (0x0750, 0x077F, SCRIPT_ARABIC),
+    (0x08A0, 0x08FF, SCRIPT_ARABIC),
+    (0x1E00, 0x1EFF, SCRIPT_LATIN),
+    (0x1F00, 0x1FFF, SCRIPT_GREEK),
+    (0xFB1D, 0xFB4F, SCRIPT_HEBREW),
+    (0xFB50, 0xFDFF, SCRIPT_ARABIC),
+    (0xFE70, 0xFEFF, SCRIPT_ARABIC),
+]
+
+def _build_script_table():
+    """Map every BMP code point to its script class"""
+    table = bytearray([SCRIPT_OTHER]) * 0x10000
+    table[0:0x250] = bytes([SCRIPT_COMMON]) * 0x250
+    for first, last, script in _SCRIPT_RANGES:
+        table[first:last + 1] = bytes([script]) * (last - first + 1)
+    return bytes(table)
+
+SCRIPT_TABLE = _build_script_table()
+
+# Letters, digits and underscore plus the combining marks that sit inside
+# Latin and Arabic-script words
+WORD_PATTERN = re.compile(r'[\w\u0300-\u036f\u064b-\u065f\u0670]+')
+
+def script_of(word):
+    """Return the script class of word, decided by its highest code point"""
+    code_point = ord(max(word))
+    if code_point > 0xFFFF:
+        return SCRIPT_OTHER
+    return SCRIPT_TABLE[code_point]
+
+def tokenize(text):
+    """Return (start, length, script) for every word in text"""
+    table = SCRIPT_TABLE
+    tokens = []
+    for match in WORD_PATTERN.finditer(text):
+        start, end = match.span()
+        code_point = ord(max(match.group()))
+        tokens.append((start, end - start,
+                       table[code_point] if code_point <= 0xFFFF else SCRIPT_OTHER))
+    return tokens